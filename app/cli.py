@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import os
+import sys
+from app.config import get_settings
+from app.db.database import SessionLocal, create_schema, get_engine
+from app.db.migrations import MIGRATIONS, applied_versions
+from app.models import archive, results, tally
+from app.utils.backend import BackendHub, parse_backend_url
+
+def init_db(args) -> int:
+    engine = get_engine()
+    for migration in create_schema(engine):
+        print(f"Applied migration {migration.version:03d} {migration.name}.")
+    print(f"Schema ready on {engine.url.render_as_string(hide_password=True)}.")
+    return 0
+
+def migrate(args) -> int:
+    if not args.list:
+        return init_db(args)
+    applied = set(applied_versions(get_engine()))
+    for migration in MIGRATIONS:
+        state = "applied" if migration.version in applied else "pending"
+        print(f"{migration.version:03d} {migration.name:<24} {state}")
+    return 0
+
+def reconcile_tallies(args) -> int:
+    db = SessionLocal()
+    try:
+        drift = tally.reconcile_tallies(db, fix=not args.dry_run)
+    finally:
+        db.close()
+
+    for row in drift:
+        print(
+            f"event {row['event_id']} option #{row['event_option_number']} "
+            f"(id {row['option_id']}): stored {row['stored']}, actual {row['actual']}"
+        )
+
+    action = "found" if args.dry_run else "fixed"
+    print(f"{len(drift)} drifted counter(s) {action}.")
+    return 1 if drift and args.dry_run else 0
+
+def finalize_results(args) -> int:
+    finalized = results.finalize_pending_events()
+    print(f"{finalized} ended event(s) finalized.")
+    return 0
+
+def archive_ballots(args) -> int:
+    retention_days = get_settings().archive_retention_days if args.retention_days is None else args.retention_days
+    events, ballots = archive.archive_ended_events(retention_days)
+    print(f"{ballots} ballot(s) of {events} event(s) ended over {retention_days:g} days ago archived.")
+    return 0
+
+def backend_hub(args) -> int:
+    url = args.url or get_settings().shared_backend_url
+    address = parse_backend_url(url)
+    if address is None:
+        print("The hub needs a unix:// or tcp:// URL (from --url or SHARED_BACKEND_URL).", file=sys.stderr)
+        return 2
+    if isinstance(address, str) and os.path.exists(address):
+        # Left over from a previous hub; nothing can be listening on it if we are starting.
+        os.remove(address)
+
+    print(f"Shared backend hub listening on {url}.")
+    try:
+        asyncio.run(BackendHub().serve(address))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="LiveVote maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init = subparsers.add_parser("init-db", help="Create the database and any missing tables, then apply pending migrations")
+    init.set_defaults(func=init_db)
+
+    upgrade = subparsers.add_parser(
+        "migrate",
+        help="Apply pending schema migrations to a database created by an earlier release",
+    )
+    upgrade.add_argument("--list", action="store_true", help="Only show which migrations are applied")
+    upgrade.set_defaults(func=migrate)
+
+    reconcile = subparsers.add_parser(
+        "reconcile-tallies",
+        help="Rebuild per-option vote counters from vote_options and report drift",
+    )
+    reconcile.add_argument("--dry-run", action="store_true", help="Only report drift, do not fix it")
+    reconcile.set_defaults(func=reconcile_tallies)
+
+    finalize = subparsers.add_parser(
+        "finalize-results",
+        help="Store the final results of every ended event that has no snapshot yet",
+    )
+    finalize.set_defaults(func=finalize_results)
+
+    archiving = subparsers.add_parser(
+        "archive-ballots",
+        help="Move the ballots of long-ended, finalized events out of the live tables",
+    )
+    archiving.add_argument(
+        "--retention-days", type=float,
+        help="Archive events that ended more than this many days ago (default: ARCHIVE_RETENTION_DAYS)",
+    )
+    archiving.set_defaults(func=archive_ballots)
+
+    hub = subparsers.add_parser(
+        "backend-hub",
+        help="Run the shared cache and pub/sub hub that worker processes connect to",
+    )
+    hub.add_argument("--url", help="unix:///path/to.sock or tcp://host:port (default: SHARED_BACKEND_URL)")
+    hub.set_defaults(func=backend_hub)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
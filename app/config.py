@@ -0,0 +1,95 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime configuration, read from the environment (and a local .env file)."""
+    database_url: str = "mysql+pymysql://root:@localhost/livevote"
+    async_database_url: Optional[str] = None
+    database_replica_url: Optional[str] = None
+    read_your_writes_seconds: float = 5
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 3600
+    db_pool_pre_ping: bool = True
+    db_echo: bool = False
+    password_bcrypt_rounds: int = 12
+    password_hash_workers: int = os.cpu_count() or 1
+    password_hash_max_pending: int = 64
+    vote_ingest_mode: str = "direct"
+    vote_ingest_batch_size: int = 200
+    vote_ingest_max_delay_ms: float = 5
+    vote_ingest_queue_depth: int = 10_000
+    result_finalize_interval_seconds: float = 60
+    archive_retention_days: float = 90
+    jwt_signing_keys: Optional[str] = None
+    jwt_active_kid: Optional[str] = None
+    shared_backend_url: str = "memory://"
+    revocation_fail_open: bool = False
+    metrics_enabled: bool = True
+    metrics_debug: bool = False
+    metrics_query_budget: int = 20
+    admission_user_rate: float = 5
+    admission_user_burst: int = 20
+    admission_event_rate: float = 500
+    admission_event_burst: int = 1000
+    admission_db_concurrency: Optional[int] = None
+    admission_db_wait_ms: float = 1000
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        defaults = cls()
+        return cls(
+            database_url=os.getenv("DATABASE_URL", defaults.database_url),
+            async_database_url=os.getenv("ASYNC_DATABASE_URL") or None,
+            database_replica_url=os.getenv("DATABASE_REPLICA_URL") or None,
+            read_your_writes_seconds=float(os.getenv("READ_YOUR_WRITES_SECONDS", defaults.read_your_writes_seconds)),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", defaults.db_pool_size)),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", defaults.db_max_overflow)),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", defaults.db_pool_timeout)),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", defaults.db_pool_recycle)),
+            db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", defaults.db_pool_pre_ping),
+            db_echo=_env_bool("DB_ECHO", defaults.db_echo),
+            password_bcrypt_rounds=int(os.getenv("PASSWORD_BCRYPT_ROUNDS", defaults.password_bcrypt_rounds)),
+            password_hash_workers=int(os.getenv("PASSWORD_HASH_WORKERS", defaults.password_hash_workers)),
+            password_hash_max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", defaults.password_hash_max_pending)),
+            vote_ingest_mode=os.getenv("VOTE_INGEST_MODE", defaults.vote_ingest_mode).strip().lower(),
+            vote_ingest_batch_size=int(os.getenv("VOTE_INGEST_BATCH_SIZE", defaults.vote_ingest_batch_size)),
+            vote_ingest_max_delay_ms=float(os.getenv("VOTE_INGEST_MAX_DELAY_MS", defaults.vote_ingest_max_delay_ms)),
+            vote_ingest_queue_depth=int(os.getenv("VOTE_INGEST_QUEUE_DEPTH", defaults.vote_ingest_queue_depth)),
+            result_finalize_interval_seconds=float(
+                os.getenv("RESULT_FINALIZE_INTERVAL_SECONDS", defaults.result_finalize_interval_seconds)
+            ),
+            archive_retention_days=float(os.getenv("ARCHIVE_RETENTION_DAYS", defaults.archive_retention_days)),
+            jwt_signing_keys=os.getenv("JWT_SIGNING_KEYS") or None,
+            jwt_active_kid=os.getenv("JWT_ACTIVE_KID") or None,
+            shared_backend_url=os.getenv("SHARED_BACKEND_URL", defaults.shared_backend_url),
+            revocation_fail_open=_env_bool("REVOCATION_FAIL_OPEN", defaults.revocation_fail_open),
+            metrics_enabled=_env_bool("METRICS_ENABLED", defaults.metrics_enabled),
+            metrics_debug=_env_bool("METRICS_DEBUG", defaults.metrics_debug),
+            metrics_query_budget=int(os.getenv("METRICS_QUERY_BUDGET", defaults.metrics_query_budget)),
+            admission_user_rate=float(os.getenv("ADMISSION_USER_RATE", defaults.admission_user_rate)),
+            admission_user_burst=int(os.getenv("ADMISSION_USER_BURST", defaults.admission_user_burst)),
+            admission_event_rate=float(os.getenv("ADMISSION_EVENT_RATE", defaults.admission_event_rate)),
+            admission_event_burst=int(os.getenv("ADMISSION_EVENT_BURST", defaults.admission_event_burst)),
+            admission_db_concurrency=(
+                int(os.environ["ADMISSION_DB_CONCURRENCY"]) if os.getenv("ADMISSION_DB_CONCURRENCY") else None
+            ),
+            admission_db_wait_ms=float(os.getenv("ADMISSION_DB_WAIT_MS", defaults.admission_db_wait_ms)),
+        )
+
+@lru_cache()
+def get_settings() -> Settings:
+    return Settings.from_env()
@@ -1,22 +1,116 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, text, DateTime, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, text, DateTime, Boolean, UniqueConstraint, Index, JSON
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import StaticPool
 from datetime import datetime
 from pytz import timezone
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Callable, Optional
+import logging
+from app.config import Settings, get_settings
+from app.db.migrations import apply_migrations
+from app.utils.admission import async_database_slots, database_slots
+from app.utils.backend import BackendUnavailable, get_backend
+from app.utils.metrics import instrument_engine
 
-DATABASE_NAME = "livevote"
-DATABASE_URL = f"mysql+pymysql://root:@localhost/{DATABASE_NAME}"
+logger = logging.getLogger(__name__)
 
-engine_without_db = create_engine("mysql+pymysql://root:@localhost")
-connection = engine_without_db.connect()
+class LazySessionMaker(sessionmaker):
+    """Session factory that creates its engine on first use instead of at import time."""
 
-connection.execute(text(f"CREATE DATABASE IF NOT EXISTS {DATABASE_NAME}"))
-connection.close()
+    def __init__(self, initializer: Callable[[], Engine], **kw):
+        super().__init__(**kw)
+        self.initializer = initializer
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.initializer()
+        return super().__call__(**local_kw)
+
+_engine: Optional[Engine] = None
+_read_engine: Optional[Engine] = None
+SessionLocal = LazySessionMaker(lambda: init_engine(), autocommit=False, autoflush=False)
+# Sessions for read-only routes; bound to DATABASE_REPLICA_URL when set, else to the primary.
+ReadSessionLocal = LazySessionMaker(lambda: init_read_engine(), autocommit=False, autoflush=False)
 Base = declarative_base()
 
+def create_db_engine(settings: Settings) -> Engine:
+    url = make_url(settings.database_url)
+    options = {"echo": settings.db_echo, "pool_pre_ping": settings.db_pool_pre_ping}
+
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # Every session must see the same in-memory database.
+            options["poolclass"] = StaticPool
+            return create_engine(url, **options)
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    return create_engine(url, **options)
+
+def init_engine(settings: Optional[Settings] = None) -> Engine:
+    """Create the engine once per process and bind the session factory to it."""
+    global _engine
+    if _engine is None:
+        settings = settings or get_settings()
+        _engine = create_db_engine(settings)
+        if settings.metrics_enabled:
+            instrument_engine(_engine)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+def get_engine() -> Engine:
+    return _engine or init_engine()
+
+def init_read_engine(settings: Optional[Settings] = None) -> Engine:
+    """Create the replica engine once per process, or reuse the primary when no replica is configured."""
+    global _read_engine
+    if _read_engine is None:
+        settings = settings or get_settings()
+        if settings.database_replica_url:
+            _read_engine = create_db_engine(replace(settings, database_url=settings.database_replica_url))
+            if settings.metrics_enabled:
+                instrument_engine(_read_engine)
+        else:
+            _read_engine = init_engine(settings)
+        ReadSessionLocal.configure(bind=_read_engine)
+    return _read_engine
+
+def is_replica_session(db) -> bool:
+    return _read_engine is not None and _read_engine is not _engine and db.get_bind() is _read_engine
+
+def pool_stats(engine: Optional[Engine]) -> Optional[dict]:
+    """Connections held by an engine's pool, for metrics."""
+    if engine is None:
+        return None
+    pool = engine.pool
+    return {name: getattr(pool, name)() for name in ("size", "checkedin", "checkedout", "overflow") if hasattr(pool, name)}
+
+def primary_pool_stats() -> Optional[dict]:
+    return pool_stats(_engine)
+
+def replica_pool_stats() -> Optional[dict]:
+    return pool_stats(_read_engine) if _read_engine is not _engine else None
+
+def dispose_engine():
+    global _engine, _read_engine
+    if _read_engine is not None and _read_engine is not _engine:
+        _read_engine.dispose()
+    _read_engine = None
+    ReadSessionLocal.configure(bind=None)
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+        SessionLocal.configure(bind=None)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -29,6 +123,10 @@ class User(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_creator_created_date", "creator_id", "created_date"),
+        Index("ix_events_end_date", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -40,27 +138,36 @@ class Event(Base):
     end_date = Column(DateTime, nullable=False)
 
     votes = relationship("Vote", back_populates="event", cascade="all, delete-orphan")
-    options = relationship("Option", back_populates="event", cascade="all, delete-orphan")
+    options = relationship("Option", back_populates="event", cascade="all, delete-orphan", order_by="Option.event_option_number")
     
 class Option(Base):
     __tablename__ = "options"
+    __table_args__ = (
+        UniqueConstraint("event_id", "event_option_number", name="uq_options_event_option_number"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     option_text = Column(String(255), nullable=False)
     event_option_number = Column(Integer, nullable=False)
+    vote_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
 
     event = relationship("Event", back_populates="options")
     vote_options = relationship("VoteOptions", back_populates="option", cascade="all, delete-orphan")
 
 class Vote(Base):
     __tablename__ = "votes"
+    __table_args__ = (
+        UniqueConstraint("event_id", "voter_id", name="uq_votes_event_voter"),
+        Index("ix_votes_voter_joined_at", "voter_id", "joined_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     voter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     joined_at = Column(DateTime, default=lambda: datetime.now(timezone("Asia/Jakarta")), nullable=False)
     already_vote = Column(Boolean, default=False)
+    voted_at = Column(DateTime, nullable=True)
 
     event = relationship("Event", back_populates="votes")
     voter = relationship("User", back_populates="votes")
@@ -68,6 +175,10 @@ class Vote(Base):
     
 class VoteOptions(Base):
     __tablename__ = "vote_options"
+    __table_args__ = (
+        UniqueConstraint("vote_id", "option_id", name="uq_vote_options_vote_option"),
+        Index("ix_vote_options_option_id", "option_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     vote_id = Column(Integer, ForeignKey("votes.id", ondelete="CASCADE"), nullable=False)
@@ -76,11 +187,140 @@ class VoteOptions(Base):
     vote = relationship("Vote", back_populates="vote_options")
     option = relationship("Option", back_populates="vote_options")
 
-Base.metadata.create_all(bind=engine)
+class EventResultSnapshot(Base):
+    """Final results of an ended event, written once by the result finalizer."""
+    __tablename__ = "event_result_snapshots"
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    total_votes = Column(Integer, nullable=False)
+    results = Column(JSON, nullable=False)
+    most_voted_option = Column(String(255), nullable=True)
+    vote_histogram = Column(JSON, nullable=False)
+    finalized_at = Column(DateTime, nullable=False)
+
+class ArchivedBallot(Base):
+    """A votes row of an archived event, with the chosen option numbers packed into it.
+
+    Written by `python -m app.cli archive-ballots`, which removes the live votes and vote_options rows.
+    """
+    __tablename__ = "archived_ballots"
+    __table_args__ = (
+        Index("ix_archived_ballots_voter_joined_at", "voter_id", "joined_at", "vote_id"),
+    )
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    vote_id = Column(Integer, primary_key=True, autoincrement=False)
+    voter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    joined_at = Column(DateTime, nullable=False)
+    voted_at = Column(DateTime, nullable=True)
+    already_vote = Column(Boolean, nullable=False, default=False)
+    option_numbers = Column(JSON, nullable=False)
+
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+def async_database_url(settings: Settings) -> URL:
+    """Use ASYNC_DATABASE_URL if given, else swap DATABASE_URL's driver for its asyncio counterpart."""
+    if settings.async_database_url:
+        return make_url(settings.async_database_url)
+    url = make_url(settings.database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No asyncio driver known for {url.drivername}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=driver)
+
+def init_async_engine(settings: Optional[Settings] = None) -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        settings = settings or get_settings()
+        url = async_database_url(settings)
+        options = {"echo": settings.db_echo, "pool_pre_ping": settings.db_pool_pre_ping}
+        if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+            options["poolclass"] = StaticPool
+        else:
+            options.update(
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+                pool_recycle=settings.db_pool_recycle,
+            )
+        _async_engine = create_async_engine(url, **options)
+        if settings.metrics_enabled:
+            instrument_engine(_async_engine.sync_engine)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+def async_pool_stats() -> Optional[dict]:
+    return pool_stats(_async_engine.sync_engine) if _async_engine is not None else None
+
+async def dispose_async_engine():
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        AsyncSessionLocal.configure(bind=None)
+
+def create_schema(engine: Optional[Engine] = None):
+    """Create the database (MySQL), every missing table, and apply pending migrations.
+
+    Run via `python -m app.cli init-db`.
+    """
+    engine = engine or get_engine()
+    url = engine.url
+    if url.get_backend_name() == "mysql" and url.database:
+        server_engine = create_engine(url.set(database=None))
+        with server_engine.connect() as connection:
+            connection.execute(text(f"CREATE DATABASE IF NOT EXISTS `{url.database}`"))
+        server_engine.dispose()
+    Base.metadata.create_all(bind=engine)
+    return apply_migrations(engine)
 
 def get_db():
-    db = SessionLocal()
-    try:
+    with database_slots.slot():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+@contextmanager
+def db_session():
+    """A short-lived primary session outside the request's dependencies, holding a database slot while open."""
+    with database_slots.slot(), SessionLocal() as db:
         yield db
+
+def mark_recent_write(user_id: int):
+    """Pin the user's reads to the primary for a while so they see what they just wrote."""
+    settings = get_settings()
+    if settings.database_replica_url:
+        try:
+            get_backend().set(f"recent-write:{user_id}", 1, ttl=settings.read_your_writes_seconds)
+        except BackendUnavailable:
+            # The write is committed; read_session_for sends every read to the primary meanwhile.
+            logger.warning("Could not pin reads of user %s to the primary", user_id, exc_info=True)
+
+def read_session_for(user_id: int):
+    """A read session on the replica, or on the primary if the user wrote recently."""
+    if not get_settings().database_replica_url:
+        return SessionLocal()
+    try:
+        recent_write = get_backend().get(f"recent-write:{user_id}")
+    except BackendUnavailable:
+        # Without the shared backend we cannot tell, so stay on the safe side.
+        return SessionLocal()
+    return SessionLocal() if recent_write else ReadSessionLocal()
+
+async def get_async_db():
+    if _async_engine is None:
+        init_async_engine()
+    await async_database_slots.enter_async()
+    try:
+        async with AsyncSessionLocal() as db:
+            yield db
     finally:
-        db.close()
+        async_database_slots.leave()
@@ -0,0 +1,95 @@
+"""Versioned schema changes for databases created by earlier releases.
+
+`create_all` only adds missing tables, so columns and indexes introduced later are applied here,
+in order, and recorded in `schema_migrations`. Every step checks the live schema first, which
+makes them no-ops on a database that `create_all` just built with the current models.
+"""
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Sequence
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(existing["name"] == column for existing in inspect(conn).get_columns(table))
+
+def _ensure_index(conn: Connection, table: str, name: str, columns: Sequence[str], unique: bool = False):
+    """Create the index unless one with the same name, or a unique key on the same columns, exists."""
+    inspector = inspect(conn)
+    existing = inspector.get_indexes(table) + [
+        dict(constraint, unique=True) for constraint in inspector.get_unique_constraints(table)
+    ]
+    for index in existing:
+        if index["name"] == name or (unique and index.get("unique") and list(index["column_names"]) == list(columns)):
+            return
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)})"
+    ))
+
+def _option_vote_counts(conn: Connection):
+    if _has_column(conn, "options", "vote_count"):
+        return
+    conn.execute(text("ALTER TABLE options ADD COLUMN vote_count INTEGER NOT NULL DEFAULT 0"))
+    conn.execute(text(
+        "UPDATE options SET vote_count = "
+        "(SELECT COUNT(*) FROM vote_options WHERE vote_options.option_id = options.id)"
+    ))
+
+def _unique_ballots(conn: Connection):
+    # Fails if the table already holds duplicates; remove them first.
+    _ensure_index(conn, "votes", "uq_votes_event_voter", ["event_id", "voter_id"], unique=True)
+    _ensure_index(conn, "vote_options", "uq_vote_options_vote_option", ["vote_id", "option_id"], unique=True)
+
+def _history_indexes(conn: Connection):
+    _ensure_index(conn, "events", "ix_events_creator_created_date", ["creator_id", "created_date"])
+    _ensure_index(conn, "votes", "ix_votes_voter_joined_at", ["voter_id", "joined_at", "id"])
+    _ensure_index(conn, "events", "ix_events_end_date", ["end_date"])
+
+def _ballot_cast_time(conn: Connection):
+    if not _has_column(conn, "votes", "voted_at"):
+        conn.execute(text("ALTER TABLE votes ADD COLUMN voted_at DATETIME NULL"))
+
+def _hot_lookup_indexes(conn: Connection):
+    # votes(event_id, voter_id) and vote_options(vote_id) are served by the unique keys above.
+    _ensure_index(conn, "vote_options", "ix_vote_options_option_id", ["option_id"])
+    _ensure_index(conn, "options", "uq_options_event_option_number", ["event_id", "event_option_number"], unique=True)
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "option_vote_counts", _option_vote_counts),
+    Migration(2, "unique_ballots", _unique_ballots),
+    Migration(3, "history_indexes", _history_indexes),
+    Migration(4, "ballot_cast_time", _ballot_cast_time),
+    Migration(5, "hot_lookup_indexes", _hot_lookup_indexes),
+]
+
+def applied_versions(engine: Engine) -> List[int]:
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return list(conn.scalars(select(schema_migrations.c.version).order_by(schema_migrations.c.version)))
+
+def apply_migrations(engine: Engine) -> List[Migration]:
+    """Apply every pending migration, each in its own transaction; return the ones applied."""
+    done = set(applied_versions(engine))
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(insert(schema_migrations).values(
+                version=migration.version, name=migration.name, applied_at=datetime.now(),
+            ))
+        applied.append(migration)
+    return applied
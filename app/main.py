@@ -1,15 +1,81 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer
-from app.routes import auth, event, home
+from app.config import get_settings
+from app.db import database
+from app.db.database import init_engine, init_read_engine, dispose_engine, dispose_async_engine
+from app.routes import auth, event, event_async, home
+from app.models import ingest, results
+from app.models.event import event_cache
+from app.utils import admission, backend, hashing, jwt_utils, metrics
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    init_engine(settings)
+    init_read_engine(settings)
+    shared = backend.init_backend(settings)
+    shared.subscribe(event.RESULT_UPDATES_CHANNEL, event.on_result_updates)
+    shared.subscribe(jwt_utils.REVOCATION_CHANNEL, jwt_utils.on_revocation)
+    if settings.vote_ingest_mode == "batched":
+        ingest.start_vote_ingestor(settings, on_commit=event.notify_results)
+    finalizer = None
+    if settings.result_finalize_interval_seconds > 0:
+        finalizer = asyncio.create_task(results.run_result_finalizer(settings.result_finalize_interval_seconds))
+    yield
+    if finalizer is not None:
+        finalizer.cancel()
+        with suppress(asyncio.CancelledError):
+            await finalizer
+    ingest.stop_vote_ingestor()
+    hashing.shutdown_executor()
+    await dispose_async_engine()
+    dispose_engine()
+    backend.close_backend()
+
+app = FastAPI(lifespan=lifespan)
+
+settings = get_settings()
+if settings.metrics_enabled:
+    app.add_middleware(
+        metrics.MetricsMiddleware,
+        debug=settings.metrics_debug,
+        query_budget=settings.metrics_query_budget,
+    )
+    metrics.registry.register_source("db_pool_primary", database.primary_pool_stats)
+    metrics.registry.register_source("db_pool_replica", database.replica_pool_stats)
+    metrics.registry.register_source("db_pool_async", database.async_pool_stats)
+    metrics.registry.register_source("event_cache", event_cache.stats)
+    metrics.registry.register_source("result_cache", results.result_cache.stats)
+    metrics.registry.register_source("token_cache", jwt_utils.verified_tokens.stats)
+    metrics.registry.register_source("admission", admission.stats)
+    metrics.registry.register_source("vote_ingest", lambda: ingest.vote_ingestor.stats() if ingest.vote_ingestor else None)
+    metrics.registry.register_source("result_stream", lambda: {
+        "subscribers": event.result_broadcaster.subscriber_count(),
+        "aggregations": event.result_broadcaster.aggregations,
+    })
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 app.include_router(auth.router)
 app.include_router(event.router)
+app.include_router(event_async.router)
 app.include_router(home.router)
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to LiveVote API"}
+
+@app.get("/internal/stats", include_in_schema=False)
+def read_internal_stats():
+    return {
+        "event_cache": event_cache.stats(),
+        "admission": admission.stats(),
+        "vote_ingest": ingest.vote_ingestor.stats() if ingest.vote_ingestor else None,
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal, ArchivedBallot, Event, EventResultSnapshot, Option, Vote, VoteOptions
+
+ARCHIVE_BATCH_EVENTS = 100
+# Ballots moved per transaction; also bounds the IN lists below.
+ARCHIVE_CHUNK_BALLOTS = 500
+
+def archivable_events(db: Session, retention_days: float, limit: int = ARCHIVE_BATCH_EVENTS) -> List[int]:
+    """Events that ended over `retention_days` ago, have final results, and still have live ballot rows."""
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    return db.scalars(
+        select(Event.id)
+        .join(EventResultSnapshot, EventResultSnapshot.event_id == Event.id)
+        .where(Event.end_date < cutoff, exists().where(Vote.event_id == Event.id))
+        .order_by(Event.end_date)
+        .limit(limit)
+    ).all()
+
+def archive_event(db: Session, event_id: int, chunk_size: int = ARCHIVE_CHUNK_BALLOTS) -> int:
+    """Move an event's votes and vote_options rows into archived_ballots; return the ballots moved.
+
+    Ballots move in ascending vote_id order, one committed chunk at a time, so an interrupted
+    run leaves every ballot in exactly one of the two places and can simply be repeated.
+    """
+    moved = 0
+    while True:
+        votes = db.execute(
+            select(Vote.id, Vote.voter_id, Vote.joined_at, Vote.voted_at, Vote.already_vote)
+            .where(Vote.event_id == event_id)
+            .order_by(Vote.id)
+            .limit(chunk_size)
+        ).all()
+        if not votes:
+            return moved
+
+        vote_ids = [vote.id for vote in votes]
+        option_numbers = defaultdict(list)
+        for vote_id, number in db.execute(
+            select(VoteOptions.vote_id, Option.event_option_number)
+            .join(Option, Option.id == VoteOptions.option_id)
+            .where(VoteOptions.vote_id.in_(vote_ids))
+            .order_by(VoteOptions.vote_id, Option.event_option_number)
+        ):
+            option_numbers[vote_id].append(number)
+
+        db.execute(insert(ArchivedBallot), [
+            {
+                "event_id": event_id,
+                "vote_id": vote.id,
+                "voter_id": vote.voter_id,
+                "joined_at": vote.joined_at,
+                "voted_at": vote.voted_at,
+                "already_vote": bool(vote.already_vote),
+                "option_numbers": option_numbers[vote.id],
+            }
+            for vote in votes
+        ])
+        db.execute(delete(VoteOptions).where(VoteOptions.vote_id.in_(vote_ids)))
+        db.execute(delete(Vote).where(Vote.id.in_(vote_ids)))
+        db.commit()
+        moved += len(votes)
+
+def archive_ended_events(retention_days: float) -> Tuple[int, int]:
+    """Archive every event past the retention window; return (events, ballots) archived."""
+    db = SessionLocal()
+    try:
+        events = ballots = 0
+        while True:
+            batch = archivable_events(db, retention_days)
+            for event_id in batch:
+                ballots += archive_event(db, event_id)
+            events += len(batch)
+            if len(batch) < ARCHIVE_BATCH_EVENTS:
+                return events, ballots
+    finally:
+        db.close()
@@ -1,47 +1,131 @@
-from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.db.database import Event, Option
 from app.models.schemas import EventCreate
+from app.utils.cache import TTLCache
 import random
 import string
 
+UNIQUE_CODE_ATTEMPTS = 5
+EVENT_CACHE_SIZE = 10_000
+EVENT_CACHE_TTL_SECONDS = 300
+
+class UniqueCodeExhausted(Exception):
+    pass
+
+class OptionSnapshot(NamedTuple):
+    id: int
+    event_option_number: int
+    option_text: str
+
+@dataclass(frozen=True)
+class EventSnapshot:
+    """Immutable copy of the fields of an event that never change after creation."""
+    id: int
+    creator_id: int
+    unique_code: str
+    title: str
+    question: str
+    allow_multiple_votes: bool
+    created_date: datetime
+    end_date: datetime
+    options: Tuple[OptionSnapshot, ...]
+    option_ids: Mapping[int, int]
+
+    @property
+    def has_ended(self) -> bool:
+        return datetime.now() > self.end_date
+
+event_cache = TTLCache(maxsize=EVENT_CACHE_SIZE, ttl=EVENT_CACHE_TTL_SECONDS)
+
+def _as_stored(value: datetime) -> datetime:
+    """Datetime columns keep the wall-clock time and drop the offset; mirror that for fresh objects."""
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+def snapshot_event(event: Event, options) -> EventSnapshot:
+    options = tuple(sorted(
+        (OptionSnapshot(option.id, option.event_option_number, option.option_text) for option in options),
+        key=lambda option: option.event_option_number,
+    ))
+    return EventSnapshot(
+        id=event.id,
+        creator_id=event.creator_id,
+        unique_code=event.unique_code,
+        title=event.title,
+        question=event.question,
+        allow_multiple_votes=bool(event.allow_multiple_votes),
+        created_date=_as_stored(event.created_date),
+        end_date=_as_stored(event.end_date),
+        options=options,
+        option_ids=MappingProxyType({option.event_option_number: option.id for option in options}),
+    )
+
+def event_snapshot_statement(unique_code: str):
+    return select(Event).options(selectinload(Event.options)).where(Event.unique_code == unique_code)
+
+def _cache_snapshot(db_event: Optional[Event]) -> Optional[EventSnapshot]:
+    if db_event is None:
+        return None
+    snapshot = snapshot_event(db_event, db_event.options)
+    event_cache.set(snapshot.unique_code, snapshot)
+    return snapshot
+
+def get_event_snapshot(db: Session, unique_code: str) -> Optional[EventSnapshot]:
+    """Read-through lookup of an event and its options by join code."""
+    snapshot = event_cache.get(unique_code)
+    if snapshot is None:
+        snapshot = _cache_snapshot(db.scalars(event_snapshot_statement(unique_code)).first())
+    return snapshot
+
+async def get_event_snapshot_async(db: AsyncSession, unique_code: str) -> Optional[EventSnapshot]:
+    """Same as get_event_snapshot, for routes using an AsyncSession."""
+    snapshot = event_cache.get(unique_code)
+    if snapshot is None:
+        snapshot = _cache_snapshot((await db.scalars(event_snapshot_statement(unique_code))).first())
+    return snapshot
+
 def generate_unique_code(length: int = 5) -> str:
     """Generate a unique code for event."""
     characters = string.ascii_letters + string.digits
     return ''.join(random.choices(characters, k=length))
 
 def create_event(db: Session, event_data: EventCreate, user_id: int):
-    """Create a new event and save it to the database."""
-    unique_code = generate_unique_code()
-
-    new_event = Event(
-        creator_id=user_id,
-        title=event_data.title,
-        question=event_data.question,
-        allow_multiple_votes=event_data.allow_multiple_votes,
-        end_date=event_data.end_date,
-        unique_code=unique_code
-    )
-    
-    db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
-
-    for option_text in event_data.options:
-        add_option_to_event(db, event_id=new_event.id, option_text=option_text)
+    """Create a new event and all of its options in a single transaction."""
+    for _ in range(UNIQUE_CODE_ATTEMPTS):
+        new_event = Event(
+            creator_id=user_id,
+            title=event_data.title,
+            question=event_data.question,
+            allow_multiple_votes=event_data.allow_multiple_votes,
+            end_date=event_data.end_date,
+            unique_code=generate_unique_code()
+        )
+        db.add(new_event)
+        try:
+            db.flush()
+            break
+        except IntegrityError:
+            # The join code collided with the unique index; nothing else is in the transaction yet.
+            db.rollback()
+    else:
+        raise UniqueCodeExhausted(f"Could not allocate a unique event code after {UNIQUE_CODE_ATTEMPTS} attempts")
 
-    return new_event
-
-def add_option_to_event(db: Session, event_id: int, option_text: str):
-    """Tambahkan opsi ke event tertentu dengan nomor urut per event."""
-    max_number = db.query(Option).filter(Option.event_id == event_id).count()
-
-    new_option = Option(
-        event_id=event_id,
-        option_text=option_text,
-        event_option_number=max_number + 1
-    )
-    db.add(new_option)
+    db.execute(insert(Option), [
+        {"event_id": new_event.id, "option_text": option_text, "event_option_number": number}
+        for number, option_text in enumerate(event_data.options, start=1)
+    ])
+    options = db.execute(
+        select(Option.id, Option.event_option_number, Option.option_text).where(Option.event_id == new_event.id)
+    ).all()
+    snapshot = snapshot_event(new_event, options)
     db.commit()
-    db.refresh(new_option)
+    # Voters usually join right after the code is shared; have the event ready for them.
+    event_cache.set(snapshot.unique_code, snapshot)
 
-    return new_option
\ No newline at end of file
+    return new_event
@@ -0,0 +1,98 @@
+import csv
+import io
+from itertools import groupby
+from typing import Iterator, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.db.database import ReadSessionLocal, ArchivedBallot, Option, User, Vote, VoteOptions
+from app.models.schemas import ExportFormat
+from app.utils.responses import dumps
+
+# Rows fetched per round trip from the server-side cursor, and ballots encoded per chunk sent.
+EXPORT_FETCH_SIZE = 1000
+EXPORT_CHUNK_BALLOTS = 500
+EXPORT_COLUMNS = ("vote_id", "voter_id", "voter_email", "voted_at", "option_numbers")
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+def ballot_rows_statement(event_id: int, after: Optional[int] = None):
+    """One row per chosen option of every cast ballot, ordered by ballot so rows group cheaply."""
+    statement = (
+        select(
+            Vote.id,
+            Vote.voter_id,
+            User.email,
+            func.coalesce(Vote.voted_at, Vote.joined_at),
+            Option.event_option_number,
+        )
+        .join(User, User.id == Vote.voter_id)
+        .join(VoteOptions, VoteOptions.vote_id == Vote.id)
+        .join(Option, Option.id == VoteOptions.option_id)
+        .where(Vote.event_id == event_id, Vote.already_vote == True)  # noqa: E712
+        .order_by(Vote.id, Option.event_option_number)
+    )
+    if after is not None:
+        statement = statement.where(Vote.id > after)
+    return statement
+
+def archived_ballots_statement(event_id: int, after: Optional[int] = None):
+    """One row per cast ballot moved to archived_ballots, option numbers already packed."""
+    statement = (
+        select(
+            ArchivedBallot.vote_id,
+            ArchivedBallot.voter_id,
+            User.email,
+            func.coalesce(ArchivedBallot.voted_at, ArchivedBallot.joined_at),
+            ArchivedBallot.option_numbers,
+        )
+        .join(User, User.id == ArchivedBallot.voter_id)
+        .where(ArchivedBallot.event_id == event_id, ArchivedBallot.already_vote == True)  # noqa: E712
+        .order_by(ArchivedBallot.vote_id)
+    )
+    if after is not None:
+        statement = statement.where(ArchivedBallot.vote_id > after)
+    return statement
+
+def iter_ballots(db: Session, event_id: int, after: Optional[int] = None) -> Iterator[Tuple]:
+    """Yield (vote_id, voter_id, voter_email, voted_at, option_numbers) per ballot with vote_id > `after`."""
+    # Archiving moves the lowest vote_ids first, so archived ballots all precede the live ones.
+    # The live query only starts once the archived cursor is exhausted; one streams at a time.
+    for row in db.execute(archived_ballots_statement(event_id, after).execution_options(yield_per=EXPORT_FETCH_SIZE)):
+        yield tuple(row)
+    rows = db.execute(
+        ballot_rows_statement(event_id, after).execution_options(yield_per=EXPORT_FETCH_SIZE)
+    )
+    for (vote_id, voter_id, email, voted_at), options in groupby(rows, key=lambda row: tuple(row[:4])):
+        yield vote_id, voter_id, email, voted_at, [row[4] for row in options]
+
+def _encode_csv(ballots, include_header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(EXPORT_COLUMNS)
+    for vote_id, voter_id, email, voted_at, option_numbers in ballots:
+        writer.writerow((vote_id, voter_id, email, voted_at.isoformat(), ";".join(map(str, option_numbers))))
+    return buffer.getvalue().encode("utf-8")
+
+def _encode_ndjson(ballots, include_header: bool) -> bytes:
+    return b"".join(dumps(dict(zip(EXPORT_COLUMNS, ballot))) + b"\n" for ballot in ballots)
+
+def stream_ballots(event_id: int, export_format: ExportFormat, after: Optional[int] = None) -> Iterator[bytes]:
+    """Encode an event's ballots chunk by chunk. Uses its own (replica) session, as it outlives the request's."""
+    encode = _encode_csv if export_format == ExportFormat.csv else _encode_ndjson
+    db = ReadSessionLocal()
+    try:
+        chunk = []
+        first = True
+        for ballot in iter_ballots(db, event_id, after):
+            chunk.append(ballot)
+            if len(chunk) >= EXPORT_CHUNK_BALLOTS:
+                yield encode(chunk, first)
+                chunk.clear()
+                first = False
+        if chunk or first:
+            yield encode(chunk, first)
+    finally:
+        db.close()
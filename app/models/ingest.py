@@ -0,0 +1,236 @@
+import logging
+import queue
+import time
+from collections import Counter
+from concurrent.futures import Future
+from threading import Lock, Thread
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import insert, select, tuple_, update
+from app.db.database import SessionLocal, Option, Vote, VoteOptions
+from app.models import vote
+
+logger = logging.getLogger(__name__)
+
+JOINED = "joined"
+VOTED = "voted"
+NOT_JOINED = "not_joined"
+ALREADY_VOTED = "already_voted"
+
+class IngestQueueFull(Exception):
+    pass
+
+class _Item(NamedTuple):
+    kind: str
+    event_id: int
+    voter_id: int
+    option_ids: Tuple[int, ...]
+    future: Future
+    enqueued_at: float
+
+class VoteIngestor:
+    """Group-commit writer for joins and ballots.
+
+    Request handlers validate a join or vote, `submit_*` it and wait on the returned future.
+    A single writer thread drains the queue every `max_delay_ms` or `max_batch_size` items
+    and writes the whole batch with multi-row statements in one transaction, so a burst
+    of votes costs one commit per batch instead of one per request.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 200,
+        max_delay_ms: float = 5,
+        max_queue_depth: int = 10_000,
+        session_factory=SessionLocal,
+        on_commit: Optional[Callable[[Iterable[int]], None]] = None,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.session_factory = session_factory
+        self.on_commit = on_commit
+        self._queue: "queue.Queue[_Item]" = queue.Queue(maxsize=max_queue_depth)
+        self._thread: Optional[Thread] = None
+        self._running = False
+        self._stats_lock = Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = Thread(target=self._run, name="vote-ingestor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit_join(self, event_id: int, voter_id: int) -> Future:
+        return self._submit(JOINED, event_id, voter_id, ())
+
+    def submit_vote(self, event_id: int, voter_id: int, option_ids: List[int]) -> Future:
+        return self._submit(VOTED, event_id, voter_id, tuple(option_ids))
+
+    def _submit(self, kind: str, event_id: int, voter_id: int, option_ids: Tuple[int, ...]) -> Future:
+        future = Future()
+        try:
+            self._queue.put_nowait(_Item(kind, event_id, voter_id, option_ids, future, time.monotonic()))
+        except queue.Full:
+            raise IngestQueueFull()
+        return future
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+                "max_batch_size": self.max_batch_seen,
+                "avg_latency_ms": round(self.latency_total / self.items * 1000, 3) if self.items else 0,
+                "max_latency_ms": round(self.latency_max * 1000, 3),
+            }
+
+    def _run(self):
+        # Keep draining after stop() so nothing that was acknowledged as queued is lost.
+        while self._running or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._flush(batch)
+
+    def _flush(self, batch: List[_Item]):
+        try:
+            outcomes = self._write(batch)
+        except Exception as exc:
+            if len(batch) > 1:
+                # Retry one by one so a single bad item cannot fail its whole batch.
+                for item in batch:
+                    self._flush([item])
+                return
+            logger.exception("Failed to ingest %s for voter %s", batch[0].kind, batch[0].voter_id)
+            batch[0].future.set_exception(exc)
+            return
+
+        acknowledged_at = time.monotonic()
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            for item in batch:
+                latency = acknowledged_at - item.enqueued_at
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+
+        if self.on_commit is not None:
+            try:
+                self.on_commit({item.event_id for item, outcome in zip(batch, outcomes) if outcome == VOTED})
+            except Exception:
+                logger.exception("Vote ingest commit hook failed")
+
+        for item, outcome in zip(batch, outcomes):
+            item.future.set_result(outcome)
+
+    def _write(self, batch: List[_Item]) -> List[str]:
+        db = self.session_factory()
+        try:
+            outcomes = {}
+            joins = [item for item in batch if item.kind == JOINED]
+            ballots = [item for item in batch if item.kind == VOTED]
+
+            if joins:
+                pairs = {(item.event_id, item.voter_id) for item in joins}
+                existing = dict(
+                    ((event_id, voter_id), already_vote)
+                    for event_id, voter_id, already_vote in db.execute(
+                        select(Vote.event_id, Vote.voter_id, Vote.already_vote)
+                        .where(tuple_(Vote.event_id, Vote.voter_id).in_(pairs))
+                    )
+                )
+                missing = [pair for pair in pairs if pair not in existing]
+                if missing:
+                    db.execute(insert(Vote), [{"event_id": event_id, "voter_id": voter_id} for event_id, voter_id in missing])
+                for item in joins:
+                    outcomes[id(item)] = ALREADY_VOTED if existing.get((item.event_id, item.voter_id)) else JOINED
+
+            claimed = []
+            for item in ballots:
+                if db.execute(vote.claim_vote_statement(item.event_id, item.voter_id)).rowcount == 1:
+                    claimed.append(item)
+                    outcomes[id(item)] = VOTED
+                elif vote.get_vote_status(db, item.event_id, item.voter_id) is None:
+                    outcomes[id(item)] = NOT_JOINED
+                else:
+                    outcomes[id(item)] = ALREADY_VOTED
+
+            if claimed:
+                vote_ids = dict(
+                    ((event_id, voter_id), vote_id)
+                    for vote_id, event_id, voter_id in db.execute(
+                        select(Vote.id, Vote.event_id, Vote.voter_id)
+                        .where(tuple_(Vote.event_id, Vote.voter_id).in_({(item.event_id, item.voter_id) for item in claimed}))
+                    )
+                )
+                db.execute(insert(VoteOptions), [
+                    {"vote_id": vote_ids[(item.event_id, item.voter_id)], "option_id": option_id}
+                    for item in claimed
+                    for option_id in item.option_ids
+                ])
+
+                # One UPDATE per distinct increment instead of one per ballot.
+                increments = Counter(option_id for item in claimed for option_id in item.option_ids)
+                by_amount = {}
+                for option_id, amount in increments.items():
+                    by_amount.setdefault(amount, []).append(option_id)
+                for amount, option_ids in by_amount.items():
+                    db.execute(
+                        update(Option)
+                        .where(Option.id.in_(option_ids))
+                        .values(vote_count=Option.vote_count + amount)
+                        .execution_options(synchronize_session=False)
+                    )
+
+            db.commit()
+            return [outcomes[id(item)] for item in batch]
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+vote_ingestor: Optional[VoteIngestor] = None
+
+def start_vote_ingestor(settings, on_commit=None) -> VoteIngestor:
+    global vote_ingestor
+    if vote_ingestor is None:
+        vote_ingestor = VoteIngestor(
+            max_batch_size=settings.vote_ingest_batch_size,
+            max_delay_ms=settings.vote_ingest_max_delay_ms,
+            max_queue_depth=settings.vote_ingest_queue_depth,
+            on_commit=on_commit,
+        )
+        vote_ingestor.start()
+    return vote_ingestor
+
+def stop_vote_ingestor():
+    global vote_ingestor
+    if vote_ingestor is not None:
+        vote_ingestor.stop()
+        vote_ingestor = None
@@ -0,0 +1,174 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from pytz import timezone
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal, Event, EventResultSnapshot, Vote
+from app.models import tally
+from app.utils.cache import TTLCache
+from app.utils.backend import BackendUnavailable, get_backend
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A ballot that passed the end_date check just before the deadline may still be committing.
+FINALIZE_GRACE_SECONDS = 30
+FINALIZE_BATCH_SIZE = 100
+RESULT_CACHE_SIZE = 10_000
+RESULT_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Final results never change, so entries only leave the cache to bound its size.
+result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_SECONDS)
+
+def is_final(end_date: datetime, now: Optional[datetime] = None) -> bool:
+    """Whether an event ended long enough ago that its results can no longer change."""
+    return (now or datetime.now()) > end_date + timedelta(seconds=FINALIZE_GRACE_SECONDS)
+
+def bump_result_version(event_id: int):
+    """Record that ballots for the event were committed, invalidating its result ETags in every worker."""
+    get_backend().incr(f"result-version:{event_id}")
+
+def result_etag(event_id: int, end_date: datetime) -> Optional[str]:
+    """Validator for an event's results; take it before reading them so it is never newer than the body.
+
+    None while the shared backend is unreachable: without the version, no tag can be trusted.
+    """
+    if is_final(end_date):
+        return f'"r{event_id}-final"'
+    # Versions live in the shared backend; its instance id keeps tags from before a restart from matching.
+    backend = get_backend()
+    try:
+        version = backend.get(f"result-version:{event_id}") or 0
+    except BackendUnavailable:
+        logger.warning("Shared backend unavailable; serving results of event %s without an ETag", event_id)
+        return None
+    return f'"r{event_id}-{backend.instance_id}-{version}"'
+
+def _summary(snapshot: EventResultSnapshot) -> dict:
+    return {
+        "total_votes": snapshot.total_votes,
+        "results": snapshot.results,
+        "most_voted_option": snapshot.most_voted_option,
+        "vote_histogram": snapshot.vote_histogram,
+    }
+
+def vote_histogram(db: Session, event_id: int) -> Dict[str, int]:
+    """Count an event's ballots per hour in which they were cast."""
+    # Ballots cast before voted_at existed only have their join time.
+    cast_at = func.coalesce(Vote.voted_at, Vote.joined_at)
+    hours = Counter(
+        value.replace(minute=0, second=0, microsecond=0).isoformat()
+        for value in db.scalars(
+            select(cast_at).where(Vote.event_id == event_id, Vote.already_vote == True)  # noqa: E712
+        )
+    )
+    return dict(sorted(hours.items()))
+
+def finalize_event(db: Session, event_id: int) -> dict:
+    """Aggregate an ended event once and store the result as its immutable snapshot."""
+    summary = tally.summarize_results(tally.get_event_tallies(db, event_id))
+    summary["vote_histogram"] = vote_histogram(db, event_id)
+    db.add(EventResultSnapshot(
+        event_id=event_id,
+        total_votes=summary["total_votes"],
+        results=summary["results"],
+        most_voted_option=summary["most_voted_option"],
+        vote_histogram=summary["vote_histogram"],
+        finalized_at=datetime.now(timezone("Asia/Jakarta")),
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker finalized the event first; its snapshot holds the same numbers.
+        db.rollback()
+        return get_result_snapshot(db, event_id)
+
+    result_cache.set(event_id, summary)
+    return summary
+
+def finalize_ended_events(db: Session, limit: int = FINALIZE_BATCH_SIZE) -> List[int]:
+    """Finalize up to `limit` ended events that have no snapshot yet; return their ids."""
+    cutoff = datetime.now() - timedelta(seconds=FINALIZE_GRACE_SECONDS)
+    event_ids = db.scalars(
+        select(Event.id)
+        .outerjoin(EventResultSnapshot, EventResultSnapshot.event_id == Event.id)
+        .where(Event.end_date < cutoff, EventResultSnapshot.event_id.is_(None))
+        .order_by(Event.end_date)
+        .limit(limit)
+    ).all()
+    for event_id in event_ids:
+        finalize_event(db, event_id)
+    return event_ids
+
+def get_result_snapshot(db: Session, event_id: int) -> Optional[dict]:
+    """Read-through lookup of an event's final results; None if not finalized yet."""
+    summary = result_cache.get(event_id)
+    if summary is None:
+        snapshot = db.get(EventResultSnapshot, event_id)
+        if snapshot is not None:
+            summary = _summary(snapshot)
+            result_cache.set(event_id, summary)
+    return summary
+
+async def get_result_snapshot_async(db: AsyncSession, event_id: int) -> Optional[dict]:
+    """Same as get_result_snapshot, for routes using an AsyncSession."""
+    summary = result_cache.get(event_id)
+    if summary is None:
+        snapshot = await db.get(EventResultSnapshot, event_id)
+        if snapshot is not None:
+            summary = _summary(snapshot)
+            result_cache.set(event_id, summary)
+    return summary
+
+def get_result_snapshots(db: Session, event_ids: Iterable[int]) -> Dict[int, dict]:
+    """Final results for every finalized event among `event_ids`, in at most one query."""
+    found = {}
+    missing = []
+    for event_id in event_ids:
+        summary = result_cache.get(event_id)
+        if summary is None:
+            missing.append(event_id)
+        else:
+            found[event_id] = summary
+
+    if missing:
+        for snapshot in db.scalars(select(EventResultSnapshot).where(EventResultSnapshot.event_id.in_(missing))):
+            found[snapshot.event_id] = _summary(snapshot)
+            result_cache.set(snapshot.event_id, found[snapshot.event_id])
+    return found
+
+def get_final_results(db: Session, event_id: int) -> dict:
+    """Final results of an event past its grace period, finalizing it now if the finalizer has not yet."""
+    summary = get_result_snapshot(db, event_id)
+    if summary is None:
+        # `db` may be a read session on a replica; the snapshot has to be written to the primary.
+        with SessionLocal() as primary:
+            summary = finalize_event(primary, event_id)
+    return summary
+
+def finalize_pending_events() -> int:
+    db = SessionLocal()
+    try:
+        finalized = 0
+        while True:
+            batch = finalize_ended_events(db)
+            finalized += len(batch)
+            if len(batch) < FINALIZE_BATCH_SIZE:
+                return finalized
+    finally:
+        db.close()
+
+async def run_result_finalizer(interval: float):
+    """Snapshot the results of newly ended events every `interval` seconds until cancelled."""
+    while True:
+        try:
+            finalized = await asyncio.to_thread(finalize_pending_events)
+            if finalized:
+                logger.info("Finalized results of %d ended event(s)", finalized)
+        except Exception:
+            logger.exception("Result finalizer failed")
+        await asyncio.sleep(interval)
@@ -1,8 +1,9 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from typing import Dict, Optional, List
 from sqlmodel import Field
 from datetime import datetime
 from dateutil.parser import isoparse
+from enum import Enum
 
 class UserCreate(BaseModel):
     email: str
@@ -24,6 +25,12 @@ class User(BaseModel):
     class Config:
         orm_mode = True
 
+class CurrentUser(BaseModel):
+    """The authenticated caller, built from access token claims."""
+    id: int
+    email: str
+    name: str
+
 class EventCreate(BaseModel):
     title: str = Field(..., min_length=1, max_length=255)
     question: str
@@ -82,6 +89,14 @@ class EventResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class EventStatus(str, Enum):
+    active = "active"
+    ended = "ended"
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
 class CastVoteRequest(BaseModel):
     unique_code: str
     event_option_numbers: List[int]
@@ -120,6 +135,17 @@ class EventResultResponse(BaseModel):
     total_votes: int
     results: List[VoteResult]
     most_voted_option: Optional[str]
+    vote_histogram: Optional[Dict[str, int]] = None
 
     class Config:
         orm_mode = True
+
+class EventDashboardResponse(BaseModel):
+    unique_code: str
+    title: str
+    question: str
+    created_date: datetime
+    end_date: datetime
+    total_votes: int
+    results: List[VoteResult]
+    most_voted_option: Optional[str]
@@ -0,0 +1,50 @@
+from typing import Iterable, List
+from app.models.event import EventSnapshot
+
+# Builders for the hot read routes. They produce exactly what the routes' response models
+# would, straight from snapshots and row tuples, so the routes can skip model validation.
+
+def option_payload(event_option_number: int, option_text: str) -> dict:
+    return {"event_option_number": event_option_number, "option_text": option_text}
+
+def event_payload(event, options: List[dict]) -> dict:
+    """EventResponse for an EventSnapshot or an events row."""
+    return {
+        "unique_code": event.unique_code,
+        "title": event.title,
+        "question": event.question,
+        "allow_multiple_votes": bool(event.allow_multiple_votes),
+        "created_date": event.created_date,
+        "end_date": event.end_date,
+        "options": options,
+    }
+
+def event_details_payload(event: EventSnapshot) -> dict:
+    return event_payload(event, [option_payload(option.event_option_number, option.option_text) for option in event.options])
+
+def vote_result_payload(result: dict) -> dict:
+    """VoteResult for one entry of a result summary, which also carries the option's number."""
+    return {"option": result["option"], "votes": result["votes"]}
+
+def dashboard_payload(row, summary: dict) -> dict:
+    """EventDashboardResponse for an events row and its result summary."""
+    return {
+        "unique_code": row.unique_code,
+        "title": row.title,
+        "question": row.question,
+        "created_date": row.created_date,
+        "end_date": row.end_date,
+        "total_votes": summary["total_votes"],
+        "results": [vote_result_payload(result) for result in summary["results"]],
+        "most_voted_option": summary["most_voted_option"],
+    }
+
+def user_vote_payload(row, vote_choices: Iterable[dict]) -> dict:
+    """UserVoteResponse for a (title, question, unique_code, voted_at) row."""
+    return {
+        "event_title": row.title,
+        "event_question": row.question,
+        "event_unique_code": row.unique_code,
+        "vote_choices": list(vote_choices),
+        "voted_at": row.voted_at,
+    }
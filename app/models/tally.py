@@ -0,0 +1,81 @@
+from typing import Iterable, List
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app.db.database import ArchivedBallot, Option, VoteOptions
+
+def increment_tallies_statement(option_ids: List[int]):
+    return (
+        update(Option)
+        .where(Option.id.in_(option_ids))
+        .values(vote_count=Option.vote_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def event_tallies_statement(event_id: int):
+    return select(Option).where(Option.event_id == event_id).order_by(Option.event_option_number)
+
+def increment_tallies(db: Session, option_ids: Iterable[int]):
+    """Increment the materialized vote counters; caller owns the transaction."""
+    option_ids = list(option_ids)
+    if not option_ids:
+        return
+    db.execute(increment_tallies_statement(option_ids))
+
+def get_event_tallies(db: Session, event_id: int) -> List[Option]:
+    """Return the options of an event with their vote counters, one row per option."""
+    return db.scalars(event_tallies_statement(event_id)).all()
+
+def summarize_results(options: List[Option]) -> dict:
+    """Build the totals, per-option counts and winner from an event's counters."""
+    results = [
+        {"event_option_number": option.event_option_number, "option": option.option_text, "votes": option.vote_count}
+        for option in options
+    ]
+    total_votes = sum(result["votes"] for result in results)
+    most_voted_option = max(results, key=lambda x: x["votes"])["option"] if results else None
+
+    return {
+        "total_votes": total_votes,
+        "results": results,
+        "most_voted_option": most_voted_option,
+    }
+
+def reconcile_tallies(db: Session, fix: bool = True) -> List[dict]:
+    """Rebuild vote counters from vote_options and report every option that drifted.
+
+    Events with archived ballots are skipped: their counters are final and no longer match vote_options.
+    """
+    options = (
+        db.query(Option)
+        .filter(Option.event_id.not_in(select(ArchivedBallot.event_id).distinct()))
+        .order_by(Option.event_id, Option.event_option_number)
+    )
+    if fix:
+        # Lock the counters first so votes committed while we count cannot be lost.
+        options = options.with_for_update()
+    options = options.all()
+
+    actual_counts = dict(
+        db.query(VoteOptions.option_id, func.count(VoteOptions.id))
+        .group_by(VoteOptions.option_id)
+        .all()
+    )
+
+    drift = []
+    for option in options:
+        actual = actual_counts.get(option.id, 0)
+        if option.vote_count != actual:
+            drift.append({
+                "event_id": option.event_id,
+                "option_id": option.id,
+                "event_option_number": option.event_option_number,
+                "stored": option.vote_count,
+                "actual": actual,
+            })
+            if fix:
+                option.vote_count = actual
+
+    if fix:
+        db.commit()
+
+    return drift
@@ -1,22 +1,43 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from app.db.database import User
+from app.db.database import User, db_session
 from app.models.schemas import UserCreate
-from hashlib import sha256
+from app.utils import hashing
+
+# Hashing takes tens of milliseconds, so these functions open their own short sessions around
+# the queries instead of keeping a connection (and a database slot) checked out while bcrypt runs.
 
 def hash_password(password: str) -> str:
-    return sha256(password.encode()).hexdigest()
+    return hashing.hash_password(password)
 
-def create_user(db: Session, user_data: UserCreate):
+def create_user(user_data: UserCreate) -> User:
     hashed_password = hash_password(user_data.password)
-    new_user = User(email=user_data.email, name=user_data.name, password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    with db_session() as db:
+        new_user = User(email=user_data.email, name=user_data.name, password=hashed_password)
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
     return new_user
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def authenticate_user(db: Session, email: str, password: str):
-    hashed_password = hash_password(password)
-    return db.query(User).filter(User.email == email, User.password == hashed_password).first()
+def authenticate_user(email: str, password: str):
+    with db_session() as db:
+        db_user = get_user_by_email(db, email)
+    if db_user is None or not hashing.verify_password(password, db_user.password):
+        return None
+
+    if hashing.needs_rehash(db_user.password):
+        # Upgrade legacy SHA-256 (or weaker bcrypt) hashes while we have the plain password,
+        # unless the password was changed while we were hashing.
+        new_hash = hash_password(password)
+        with db_session() as db:
+            db.execute(
+                update(User)
+                .where(User.id == db_user.id, User.password == db_user.password)
+                .values(password=new_hash)
+            )
+            db.commit()
+
+    return db_user
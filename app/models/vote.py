@@ -0,0 +1,39 @@
+from datetime import datetime
+from pytz import timezone
+from typing import List
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app.db.database import Option, Vote, VoteOptions
+
+# Statements are built separately so the sync and async routes share the same SQL.
+
+def claim_vote_statement(event_id: int, voter_id: int):
+    return (
+        update(Vote)
+        .where(Vote.event_id == event_id, Vote.voter_id == voter_id, Vote.already_vote == False)  # noqa: E712
+        .values(already_vote=True, voted_at=datetime.now(timezone("Asia/Jakarta")))
+        .execution_options(synchronize_session=False)
+    )
+
+def vote_status_statement(event_id: int, voter_id: int):
+    return select(Vote.already_vote).where(Vote.event_id == event_id, Vote.voter_id == voter_id)
+
+def insert_vote_options_statement(event_id: int, voter_id: int, option_ids: List[int]):
+    return insert(VoteOptions).from_select(
+        ["vote_id", "option_id"],
+        select(Vote.id, Option.id)
+        .join(Option, Option.event_id == Vote.event_id)
+        .where(Vote.event_id == event_id, Vote.voter_id == voter_id, Option.id.in_(option_ids)),
+    )
+
+def claim_vote(db: Session, event_id: int, voter_id: int) -> bool:
+    """Atomically flip already_vote for a joined voter; only one concurrent caller can win."""
+    return db.execute(claim_vote_statement(event_id, voter_id)).rowcount == 1
+
+def get_vote_status(db: Session, event_id: int, voter_id: int):
+    """Return already_vote for the voter's join row, or None if they never joined."""
+    return db.execute(vote_status_statement(event_id, voter_id)).scalar_one_or_none()
+
+def insert_vote_options(db: Session, event_id: int, voter_id: int, option_ids: List[int]):
+    """Insert every chosen option for the voter's ballot in one INSERT ... SELECT."""
+    db.execute(insert_vote_options_statement(event_id, voter_id, option_ids))
@@ -1,17 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, Form, status
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from app.models import schemas, user
-from app.db.database import get_db
-from app.utils.jwt_utils import create_access_token, verify_token
+from app.db.database import db_session, read_session_for
+from app.utils.admission import database_slots
+from app.utils.jwt_utils import create_access_token, verify_token, is_revoked
 from fastapi.security import OAuth2PasswordBearer
-from datetime import timedelta
 import re
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> schemas.User:
+def get_current_user(token: str = Depends(oauth2_scheme)) -> schemas.CurrentUser:
+    """Resolve the caller from the token claims alone; no database round trip."""
     user_info = verify_token(token)
     if not user_info:
         raise HTTPException(
@@ -20,20 +21,29 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
         )
     
     email = user_info.get("sub")
-    if email is None:
+    user_id = user_info.get("uid")
+    if email is None or user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
         )
-    
-    db_user = user.get_user_by_email(db, email)
-    if db_user is None:
+
+    if is_revoked(user_info):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
         )
     
-    return db_user
+    return schemas.CurrentUser(id=user_id, email=email, name=user_info.get("name", ""))
+
+def get_read_db(current_user: schemas.CurrentUser = Depends(get_current_user)):
+    """Session for read-only routes: the replica, unless the caller wrote within READ_YOUR_WRITES_SECONDS."""
+    with database_slots.slot():
+        db = read_session_for(current_user.id)
+        try:
+            yield db
+        finally:
+            db.close()
 
 def validate_email(email: str):
     email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -47,7 +57,7 @@ def validate_password(password: str):
         raise HTTPException(status_code=400, detail="Password must contain at least one number")
 
 @router.post("/register")
-def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+def register(user_data: schemas.UserCreate):
     validate_email(user_data.email)
 
     if not user_data.name or user_data.name.strip() == "":
@@ -55,22 +65,26 @@ def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
 
     validate_password(user_data.password)
 
-    existing_user = user.get_user_by_email(db, user_data.email)
+    with db_session() as db:
+        existing_user = user.get_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    new_user = user.create_user(db, user_data)
+    try:
+        new_user = user.create_user(user_data)
+    except IntegrityError:
+        # Registered concurrently while the password was being hashed.
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"message": "User registered successfully", "user": new_user.email}
 
 @router.post("/login")
 def login(
     email: str = Form(...), 
-    password: str = Form(...), 
-    db: Session = Depends(get_db)
+    password: str = Form(...),
 ):
-    db_user = user.authenticate_user(db, email, password)
+    db_user = user.authenticate_user(email, password)
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    access_token = create_access_token(data={"sub": db_user.email})
+    access_token = create_access_token(data={"sub": db_user.email, "uid": db_user.id, "name": db_user.name})
     return {"message": "Login successful", "access_token": access_token, "token_type": "bearer"}
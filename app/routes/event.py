@@ -1,34 +1,73 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from collections import defaultdict
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.db.database import get_db, Event, Vote, Option, VoteOptions
-from app.models import schemas, event
-from app.routes.auth import get_current_user
-from app.models.schemas import EventResponse, OptionResponse
+from app.db.database import get_db, is_replica_session, mark_recent_write, SessionLocal, Event, Option, Vote
+from app.models import schemas, event, export, ingest, results, serializers, tally, vote
+from app.models.event import EventSnapshot, get_event_snapshot
+from app.routes.auth import get_current_user, get_read_db
+from app.models.schemas import EventResponse
+from app.utils import admission
+from app.utils.backend import BackendUnavailable, get_backend
+from app.utils.broadcaster import ResultBroadcaster
+from app.utils.conditional import conditional_get
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_before, paginate
+from app.utils.responses import json_response
+from concurrent.futures import Future
 from datetime import datetime
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAM_HEARTBEAT_SECONDS = 15
+INGEST_ACK_TIMEOUT_SECONDS = 10
+# Event details never change after creation; live results must be revalidated on every poll.
+DETAILS_CACHE_CONTROL = "private, max-age=3600"
+LIVE_RESULT_CACHE_CONTROL = "private, no-cache"
+FINAL_RESULT_CACHE_CONTROL = "private, max-age=86400"
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
+async def admit_vote(request: Request, current_user: schemas.CurrentUser = Depends(get_current_user)):
+    """Turn away joins and ballots over the per-user or per-event rate before a session is opened."""
+    body = await request.json()
+    unique_code = body.get("unique_code") if isinstance(body, dict) else None
+    admission.admit_vote(current_user.id, unique_code if isinstance(unique_code, str) else None)
+
 @router.post("/create")
 def create_event(
     event_data: schemas.EventCreate,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
-    new_event = event.create_event(db, event_data, current_user.id)
+    try:
+        new_event = event.create_event(db, event_data, current_user.id)
+    except event.UniqueCodeExhausted:
+        raise HTTPException(
+            status_code=503,
+            detail="Could not allocate an event code, please try again.",
+            headers={"Retry-After": "1"},
+        )
+    mark_recent_write(current_user.id)
     return {
         "message": "Event created successfully",
         "event": new_event.title,
         "unique_code": new_event.unique_code
     }
 
-@router.post("/join")
+@router.post("/join", dependencies=[Depends(admit_vote)])
 def join_event(
     join_data: schemas.JoinEventRequest,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
-    event = db.query(Event).filter(Event.unique_code == join_data.unique_code).first()
+    event = get_event_snapshot(db, join_data.unique_code)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -38,6 +77,13 @@ def join_event(
     if datetime.now() > event.end_date:
         raise HTTPException(status_code=400, detail="Event has already ended. You can no longer join.")
 
+    if ingest.vote_ingestor is not None:
+        future = submit_to_ingestor(ingest.vote_ingestor.submit_join, event.id, current_user.id)
+        if wait_for_ingest(future) == ingest.ALREADY_VOTED:
+            raise HTTPException(status_code=400, detail="You have already voted, cannot join again.")
+        mark_recent_write(current_user.id)
+        return {"message": f'Event "{event.title}" found. Please proceed with liveness detection before voting.'}
+
     existing_vote = db.query(Vote).filter(
         Vote.event_id == event.id,
         Vote.voter_id == current_user.id
@@ -54,133 +100,420 @@ def join_event(
             voter_id=current_user.id
         )
         db.add(new_vote)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent join from the same user won the race; that is fine.
+            db.rollback()
+        mark_recent_write(current_user.id)
 
     return {"message": f'Event "{event.title}" found. Please proceed with liveness detection before voting.'}
 
 @router.get("/retrieve", response_model=List[schemas.EventResponse])
 def get_all_events(
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[schemas.EventStatus] = None,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
 ):
-    events = db.query(Event).filter(Event.creator_id == current_user.id).order_by(Event.created_date.desc()).all()
-    if not events:
+    query = select(
+        Event.id,
+        Event.unique_code,
+        Event.title,
+        Event.question,
+        Event.allow_multiple_votes,
+        Event.created_date,
+        Event.end_date,
+    ).where(Event.creator_id == current_user.id)
+    if status == schemas.EventStatus.active:
+        query = query.where(Event.end_date >= datetime.now())
+    elif status == schemas.EventStatus.ended:
+        query = query.where(Event.end_date < datetime.now())
+    if cursor:
+        query = query.where(keyset_before(Event.created_date, Event.id, cursor))
+
+    rows = db.execute(query.order_by(Event.created_date.desc(), Event.id.desc()).limit(limit + 1)).all()
+    if not rows and not cursor:
         raise HTTPException(status_code=404, detail="No events found")
 
-    return events
+    rows = paginate(rows, limit, response, lambda row: (row.created_date, row.id))
+
+    # Finalized events carry their options in the result snapshot; only load the rest.
+    final_results = results.get_result_snapshots(db, [row.id for row in rows if results.is_final(row.end_date)])
+    options = defaultdict(list)
+    for event_id, summary in final_results.items():
+        options[event_id] = [
+            serializers.option_payload(result["event_option_number"], result["option"])
+            for result in summary["results"]
+        ]
+    pending = [row.id for row in rows if row.id not in final_results]
+    if pending:
+        for event_id, number, option_text in db.execute(
+            select(Option.event_id, Option.event_option_number, Option.option_text)
+            .where(Option.event_id.in_(pending))
+            .order_by(Option.event_id, Option.event_option_number)
+        ):
+            options[event_id].append(serializers.option_payload(number, option_text))
+
+    return json_response([serializers.event_payload(row, options[row.id]) for row in rows], response)
+
+@router.get("/dashboard", response_model=List[schemas.EventDashboardResponse])
+def get_dashboard(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[schemas.EventStatus] = None,
+    unique_code: Optional[List[str]] = Query(None, description="Only these events; repeat for several"),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+):
+    """Results of the caller's events, paginated like /events/retrieve, in a constant number of queries."""
+    query = select(
+        Event.id,
+        Event.unique_code,
+        Event.title,
+        Event.question,
+        Event.created_date,
+        Event.end_date,
+    ).where(Event.creator_id == current_user.id)
+    if unique_code:
+        query = query.where(Event.unique_code.in_(unique_code))
+    if status == schemas.EventStatus.active:
+        query = query.where(Event.end_date >= datetime.now())
+    elif status == schemas.EventStatus.ended:
+        query = query.where(Event.end_date < datetime.now())
+    if cursor:
+        query = query.where(keyset_before(Event.created_date, Event.id, cursor))
+
+    rows = db.execute(query.order_by(Event.created_date.desc(), Event.id.desc()).limit(limit + 1)).all()
+    rows = paginate(rows, limit, response, lambda row: (row.created_date, row.id))
+
+    summaries = results.get_result_snapshots(db, [row.id for row in rows if results.is_final(row.end_date)])
+    # Every other event is summarized from its counters, all events in one query. Ended events
+    # the finalizer has not reached yet are included too: their counters no longer change.
+    pending = [row.id for row in rows if row.id not in summaries]
+    if pending:
+        options = defaultdict(list)
+        for option in db.execute(
+            select(Option.event_id, Option.event_option_number, Option.option_text, Option.vote_count)
+            .where(Option.event_id.in_(pending))
+            .order_by(Option.event_id, Option.event_option_number)
+        ):
+            options[option.event_id].append(option)
+        for event_id in pending:
+            summaries[event_id] = tally.summarize_results(options[event_id])
+
+    return json_response([serializers.dashboard_payload(row, summaries[row.id]) for row in rows], response)
 
 @router.get("/{unique_code}", response_model=EventResponse)
 def get_event_details(
     unique_code: str,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
-    event = db.query(Event).filter(Event.unique_code == unique_code).first()
+    event = lookup_event(db, unique_code)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
+
+    not_modified = conditional_get(request, response, details_etag(event), DETAILS_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
     
-    options = db.query(Option).filter(Option.event_id == event.id).all()
-    if not options:
+    if not event.options:
         raise HTTPException(status_code=404, detail="No options found for this event")
 
-    event_data = EventResponse(
-        unique_code=event.unique_code,
-        title=event.title,
-        question=event.question,
-        allow_multiple_votes=event.allow_multiple_votes,
-        created_date=event.created_date,
-        end_date=event.end_date,
-        options=[
-            OptionResponse(
-                event_option_number=opt.event_option_number, 
-                option_text=opt.option_text
-            ) 
-            for opt in options
-        ]
+    return json_response(serializers.event_details_payload(event), response)
+
+def details_etag(event: EventSnapshot) -> str:
+    return f'"d{event.id}"'
+
+def resolve_choices(event: EventSnapshot, option_numbers: List[int]) -> List[int]:
+    """Validate the chosen event_option_numbers against the event and map them to option ids."""
+    if not all(number in event.option_ids for number in option_numbers):
+        raise HTTPException(status_code=400, detail="Invalid choice(s).")
+
+    if not event.allow_multiple_votes and len(option_numbers) > 1:
+        raise HTTPException(
+            status_code=400, 
+            detail="Multiple votes are not allowed for this event."
+        )
+
+    return [event.option_ids[number] for number in option_numbers]
+
+def raise_if_ended(event: EventSnapshot):
+    # Final results are snapshotted once an event closes, so ballots must stop at end_date.
+    if event.has_ended:
+        raise HTTPException(status_code=400, detail="Event has already ended. You can no longer vote.")
+
+def raise_for_ballot_outcome(outcome: str):
+    if outcome == ingest.NOT_JOINED:
+        raise HTTPException(status_code=400, detail="User has not joined this event")
+    if outcome == ingest.ALREADY_VOTED:
+        raise HTTPException(status_code=400, detail="You have already voted.")
+
+def ingest_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, please try again.",
+        headers={"Retry-After": "1"},
     )
-    
-    return event_data
 
-@router.post("/cast-vote")
+def submit_to_ingestor(submit, *args) -> Future:
+    try:
+        return submit(*args)
+    except ingest.IngestQueueFull:
+        raise ingest_unavailable()
+
+def wait_for_ingest(future: Future) -> str:
+    """Block until the ingestor acknowledges an item; a timeout or failed commit is a retryable 503."""
+    # After a timeout the item may still commit; a retried ballot is then answered "already voted".
+    try:
+        return future.result(INGEST_ACK_TIMEOUT_SECONDS)
+    except Exception:
+        raise ingest_unavailable()
+
+async def wait_for_ingest_async(future: Future) -> str:
+    """wait_for_ingest for async routes."""
+    try:
+        # Shielded: cancelling the wrapper on timeout would cancel the queued item under the writer.
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), INGEST_ACK_TIMEOUT_SECONDS)
+    except Exception:
+        raise ingest_unavailable()
+
+@router.post("/cast-vote", dependencies=[Depends(admit_vote)])
 def cast_vote(
     vote_data: schemas.CastVoteRequest,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
 ):
-    event = db.query(Event).filter(Event.unique_code == vote_data.unique_code).first()
+    event = get_event_snapshot(db, vote_data.unique_code)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    vote = db.query(Vote).filter(
-        Vote.event_id == event.id,
-        Vote.voter_id == current_user.id
-    ).first()
+    raise_if_ended(event)
 
-    if not vote:
-        raise HTTPException(status_code=400, detail="User has not joined this event")
+    if ingest.vote_ingestor is not None:
+        chosen_option_ids = resolve_choices(event, vote_data.event_option_numbers)
+        future = submit_to_ingestor(ingest.vote_ingestor.submit_vote, event.id, current_user.id, chosen_option_ids)
+        raise_for_ballot_outcome(wait_for_ingest(future))
+        mark_recent_write(current_user.id)
+        return {"message": f"Your votes have been cast for event '{event.title}'."}
 
-    if vote.already_vote:
-        raise HTTPException(status_code=400, detail="You have already voted.")
+    # Claiming the ballot with a conditional UPDATE (instead of read-then-write) keeps
+    # concurrent double-submits correct: only one of them can flip already_vote.
+    if not vote.claim_vote(db, event.id, current_user.id):
+        db.rollback()
+        if vote.get_vote_status(db, event.id, current_user.id) is None:
+            raise_for_ballot_outcome(ingest.NOT_JOINED)
+        raise_for_ballot_outcome(ingest.ALREADY_VOTED)
+
+    try:
+        chosen_option_ids = resolve_choices(event, vote_data.event_option_numbers)
+    except HTTPException:
+        db.rollback()
+        raise
 
-    has_voted = db.query(VoteOptions).filter(VoteOptions.vote_id == vote.id).first()
-    if has_voted:
+    try:
+        vote.insert_vote_options(db, event.id, current_user.id, chosen_option_ids)
+        tally.increment_tallies(db, chosen_option_ids)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(status_code=400, detail="You have already voted.")
+    mark_recent_write(current_user.id)
+    notify_results([event.id])
 
-    valid_options = db.query(Option).filter(Option.event_id == event.id).all()
-    valid_option_numbers = [option.event_option_number for option in valid_options]
+    return {"message": f"Your votes have been cast for event '{event.title}'."}
 
-    if not all(option_number in valid_option_numbers for option_number in vote_data.event_option_numbers):
-        raise HTTPException(status_code=400, detail="Invalid choice(s).")
+def lookup_event(db: Session, unique_code: str) -> Optional[EventSnapshot]:
+    """get_event_snapshot that also checks the primary when a replica has not caught up with a new event."""
+    event = get_event_snapshot(db, unique_code)
+    if event is None and is_replica_session(db):
+        with SessionLocal() as primary:
+            event = get_event_snapshot(primary, unique_code)
+    return event
 
-    if not event.allow_multiple_votes and len(vote_data.event_option_numbers) > 1:
-        raise HTTPException(
-            status_code=400, 
-            detail="Multiple votes are not allowed for this event."
-        )
+def get_result_event(db: Session, unique_code: str, current_user: schemas.CurrentUser) -> EventSnapshot:
+    event = lookup_event(db, unique_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
 
-    for option_number in vote_data.event_option_numbers:
-        option = db.query(Option).filter(Option.event_option_number == option_number, Option.event_id == event.id).first()
-        if option:
-            vote_option = VoteOptions(
-                vote_id=vote.id,
-                option_id=option.id
-            )
-            db.add(vote_option)
-        else:
-            raise HTTPException(status_code=400, detail=f"Option with number {option_number} not found.")
-    
-    vote.already_vote = True
-    db.commit()
+    if event.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You are not authorized to view this event's results")
 
-    return {"message": f"Your votes have been cast for event '{event.title}'."}
+    return event
+
+def build_event_result(db: Session, event: EventSnapshot) -> dict:
+    if results.is_final(event.end_date):
+        summary = results.get_final_results(db, event.id)
+    else:
+        summary = tally.summarize_results(tally.get_event_tallies(db, event.id))
+
+    return {
+        "event_title": event.title,
+        "event_question": event.question,
+        **summary
+    }
 
-@router.post("/result", response_model=schemas.EventResultResponse)
+@router.post("/result", response_model=schemas.EventResultResponse, response_model_exclude_unset=True)
 def get_event_result(
     result_request: schemas.EventResultRequest,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+):
+    event = get_result_event(db, result_request.unique_code, current_user)
+    return build_event_result(db, event)
+
+@router.get("/{unique_code}/result", response_model=schemas.EventResultResponse, response_model_exclude_unset=True)
+def get_event_result_conditional(
+    unique_code: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
 ):
-    event = db.query(Event).filter(Event.unique_code == result_request.unique_code).first()
+    """Cacheable variant of POST /events/result; answers 304 while the results are unchanged."""
+    event = get_result_event(db, unique_code, current_user)
+
+    final = results.is_final(event.end_date)
+    etag = results.result_etag(event.id, event.end_date)
+    if etag is None:
+        response.headers["Cache-Control"] = LIVE_RESULT_CACHE_CONTROL
+    else:
+        not_modified = conditional_get(
+            request, response, etag, FINAL_RESULT_CACHE_CONTROL if final else LIVE_RESULT_CACHE_CONTROL,
+        )
+        if not_modified:
+            return not_modified
+        if not final and is_replica_session(db):
+            # The live tag names the newest version; a lagging replica could put an older body behind it.
+            with SessionLocal() as primary:
+                return build_event_result(primary, event)
+
+    return build_event_result(db, event)
+
+@router.get("/{unique_code}/export")
+def export_event_ballots(
+    unique_code: str,
+    export_format: schemas.ExportFormat = Query(schemas.ExportFormat.csv, alias="format"),
+    after: Optional[int] = Query(None, ge=0, description="Resume after this vote_id"),
+    db: Session = Depends(get_read_db, scope="function"),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+):
+    """Stream every ballot of an event, one row per voter, ordered by vote_id."""
+    event = get_result_event(db, unique_code, current_user)
+    # The export can run for minutes on its own session; give this connection back now.
+    db.close()
+
+    return StreamingResponse(
+        export.stream_ballots(event.id, export_format, after),
+        media_type=export.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{event.unique_code}-ballots.{export_format.value}"'},
+    )
+
+def fetch_live_result(event_id: int) -> dict:
+    """Aggregate an event's results for the live stream, in its own session."""
+    db = SessionLocal()
+    try:
+        return tally.summarize_results(tally.get_event_tallies(db, event_id))
+    finally:
+        db.close()
+
+result_broadcaster = ResultBroadcaster(fetch_live_result)
+
+RESULT_UPDATES_CHANNEL = "result-updates"
+
+def notify_results(event_ids):
+    """Call after committing ballots: invalidates result ETags and wakes live result streams in every worker."""
+    event_ids = list(event_ids)
+    if not event_ids:
+        return
+    try:
+        for event_id in event_ids:
+            results.bump_result_version(event_id)
+        get_backend().publish(RESULT_UPDATES_CHANNEL, event_ids)
+    except BackendUnavailable:
+        # The ballots are committed either way; at worst viewers see them a little late.
+        logger.warning("Could not announce result updates for events %s", event_ids, exc_info=True)
+
+def on_result_updates(event_ids):
+    """Backend subscriber that wakes this worker's streams for results committed by any worker."""
+    for event_id in event_ids:
+        result_broadcaster.notify(event_id)
+
+def format_sse(event_name: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event_name}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/{unique_code}/stream")
+async def stream_event_result(
+    unique_code: str,
+    request: Request,
+    db: Session = Depends(get_db, scope="function"),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+):
+    event = await run_in_threadpool(get_event_snapshot, db, unique_code)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
     if event.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="You are not authorized to view this event's results")
 
-    results = []
-    total_votes = 0
+    event_id, end_date = event.id, event.end_date
+    final_summary = None
+    if results.is_final(end_date):
+        final_summary = await run_in_threadpool(results.get_final_results, db, event_id)
+    # Streams stay open for minutes; give the pooled connection back before streaming.
+    await run_in_threadpool(db.close)
 
-    for option in event.options:
-        vote_count = db.query(VoteOptions).filter(VoteOptions.option_id == option.id).count()
-        total_votes += vote_count
-        results.append({"option": option.option_text, "votes": vote_count})
+    async def event_stream():
+        if final_summary is not None:
+            yield format_sse("result", {**final_summary, "delta": {}}, 1)
+            yield format_sse("end", {"message": "Event has ended."})
+            return
 
-    most_voted_option = max(results, key=lambda x: x["votes"], default=None)["option"] if results else None
+        subscription = result_broadcaster.subscribe(event_id)
+        previous_votes = {}
+        sequence = 0
+        try:
+            while not await request.is_disconnected():
+                # Wake up at the end date too, so an event that ends without further ballots still closes.
+                remaining = (end_date - datetime.now()).total_seconds()
+                try:
+                    summary = await asyncio.wait_for(
+                        subscription.next(), timeout=min(STREAM_HEARTBEAT_SECONDS, max(remaining, 0))
+                    )
+                except asyncio.TimeoutError:
+                    if datetime.now() <= end_date:
+                        yield ": keep-alive\n\n"
+                        continue
+                    summary = await run_in_threadpool(fetch_live_result, event_id)
 
-    return {
-        "event_title": event.title,
-        "event_question": event.question,
-        "total_votes": total_votes,
-        "results": results,
-        "most_voted_option": most_voted_option
-    }
+                votes = {result["event_option_number"]: result["votes"] for result in summary["results"]}
+                delta = {
+                    number: count - previous_votes.get(number, 0)
+                    for number, count in votes.items()
+                    if count != previous_votes.get(number, 0)
+                }
+                previous_votes = votes
+                sequence += 1
+                yield format_sse("result", {**summary, "delta": delta}, sequence)
+
+                if datetime.now() > end_date:
+                    yield format_sse("end", {"message": "Event has ended."})
+                    break
+        finally:
+            result_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,155 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db, mark_recent_write, Vote
+from app.models import ingest, results, schemas, serializers, tally, vote
+from app.models.event import get_event_snapshot_async
+from app.models.schemas import EventResponse
+from app.routes.auth import get_current_user
+from app.utils.conditional import conditional_get
+from app.utils.responses import json_response
+from app.routes.event import (
+    DETAILS_CACHE_CONTROL,
+    admit_vote,
+    details_etag,
+    notify_results,
+    raise_for_ballot_outcome,
+    raise_if_ended,
+    resolve_choices,
+    submit_to_ingestor,
+    wait_for_ingest_async,
+)
+from datetime import datetime
+
+# Asyncio counterparts of the hot /events routes. Same behaviour, but the handlers
+# run on the event loop instead of Starlette's threadpool.
+router = APIRouter(prefix="/async/events", tags=["Events (async)"])
+
+@router.post("/join", dependencies=[Depends(admit_vote)])
+async def join_event(
+    join_data: schemas.JoinEventRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    event = await get_event_snapshot_async(db, join_data.unique_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    if current_user.id == event.creator_id:
+        raise HTTPException(status_code=400, detail="You cannot join an event you created.")
+
+    if datetime.now() > event.end_date:
+        raise HTTPException(status_code=400, detail="Event has already ended. You can no longer join.")
+
+    if ingest.vote_ingestor is not None:
+        future = submit_to_ingestor(ingest.vote_ingestor.submit_join, event.id, current_user.id)
+        if await wait_for_ingest_async(future) == ingest.ALREADY_VOTED:
+            raise HTTPException(status_code=400, detail="You have already voted, cannot join again.")
+        mark_recent_write(current_user.id)
+        return {"message": f'Event "{event.title}" found. Please proceed with liveness detection before voting.'}
+
+    already_vote = (await db.execute(vote.vote_status_statement(event.id, current_user.id))).scalar_one_or_none()
+    if already_vote:
+        raise HTTPException(status_code=400, detail="You have already voted, cannot join again.")
+
+    if already_vote is None:
+        try:
+            await db.execute(insert(Vote).values(event_id=event.id, voter_id=current_user.id))
+            await db.commit()
+        except IntegrityError:
+            # A concurrent join from the same user won the race; that is fine.
+            await db.rollback()
+        mark_recent_write(current_user.id)
+
+    return {"message": f'Event "{event.title}" found. Please proceed with liveness detection before voting.'}
+
+@router.get("/{unique_code}", response_model=EventResponse)
+async def get_event_details(
+    unique_code: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    event = await get_event_snapshot_async(db, unique_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    not_modified = conditional_get(request, response, details_etag(event), DETAILS_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    if not event.options:
+        raise HTTPException(status_code=404, detail="No options found for this event")
+
+    return json_response(serializers.event_details_payload(event), response)
+
+@router.post("/cast-vote", dependencies=[Depends(admit_vote)])
+async def cast_vote(
+    vote_data: schemas.CastVoteRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+):
+    event = await get_event_snapshot_async(db, vote_data.unique_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    raise_if_ended(event)
+
+    if ingest.vote_ingestor is not None:
+        chosen_option_ids = resolve_choices(event, vote_data.event_option_numbers)
+        future = submit_to_ingestor(ingest.vote_ingestor.submit_vote, event.id, current_user.id, chosen_option_ids)
+        raise_for_ballot_outcome(await wait_for_ingest_async(future))
+        mark_recent_write(current_user.id)
+        return {"message": f"Your votes have been cast for event '{event.title}'."}
+
+    claimed = await db.execute(vote.claim_vote_statement(event.id, current_user.id))
+    if claimed.rowcount != 1:
+        await db.rollback()
+        status = (await db.execute(vote.vote_status_statement(event.id, current_user.id))).scalar_one_or_none()
+        raise_for_ballot_outcome(ingest.NOT_JOINED if status is None else ingest.ALREADY_VOTED)
+
+    try:
+        chosen_option_ids = resolve_choices(event, vote_data.event_option_numbers)
+    except HTTPException:
+        await db.rollback()
+        raise
+
+    try:
+        await db.execute(vote.insert_vote_options_statement(event.id, current_user.id, chosen_option_ids))
+        await db.execute(tally.increment_tallies_statement(chosen_option_ids))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="You have already voted.")
+    mark_recent_write(current_user.id)
+    notify_results([event.id])
+
+    return {"message": f"Your votes have been cast for event '{event.title}'."}
+
+@router.post("/result", response_model=schemas.EventResultResponse, response_model_exclude_unset=True)
+async def get_event_result(
+    result_request: schemas.EventResultRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+):
+    event = await get_event_snapshot_async(db, result_request.unique_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    if event.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You are not authorized to view this event's results")
+
+    if results.is_final(event.end_date):
+        summary = await results.get_result_snapshot_async(db, event.id)
+        if summary is None:
+            summary = await db.run_sync(results.finalize_event, event.id)
+    else:
+        summary = tally.summarize_results((await db.scalars(tally.event_tallies_statement(event.id))).all())
+
+    return {
+        "event_title": event.title,
+        "event_question": event.question,
+        **summary
+    }
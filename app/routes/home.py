@@ -1,42 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException
+from collections import defaultdict
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, literal, select
 from sqlalchemy.orm import Session
-from app.routes.auth import get_current_user
-from app.db.database import get_db, Event, Vote, Option
-from typing import List
-from app.models import schemas
+from app.routes.auth import get_current_user, get_read_db
+from app.db.database import ArchivedBallot, Event, Option, Vote, VoteOptions
+from app.models import schemas, serializers
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_before, paginate
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/home", tags=["Home"])
 
 @router.get("/retrieve", response_model=List[schemas.UserVoteResponse])
 def get_user_votes(
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
 ):
-    votes = db.query(Vote).filter(Vote.voter_id == current_user.id).order_by(Vote.joined_at.desc()).all()
+    query = (
+        select(
+            Vote.id,
+            Vote.joined_at,
+            func.coalesce(Vote.voted_at, Vote.joined_at).label("voted_at"),
+            Event.title,
+            Event.question,
+            Event.unique_code,
+            literal(False).label("archived"),
+        )
+        .join(Event, Event.id == Vote.event_id)
+        .where(Vote.voter_id == current_user.id)
+    )
+    # Ballots of long-ended events live in archived_ballots, with the same ids and join times. Once a ballot
+    # is archived its id may be handed out again to a new vote, so rows say which table they came from.
+    archived_query = (
+        select(
+            ArchivedBallot.vote_id.label("id"),
+            ArchivedBallot.joined_at,
+            func.coalesce(ArchivedBallot.voted_at, ArchivedBallot.joined_at).label("voted_at"),
+            Event.title,
+            Event.question,
+            Event.unique_code,
+            ArchivedBallot.event_id,
+            ArchivedBallot.option_numbers,
+            literal(True).label("archived"),
+        )
+        .join(Event, Event.id == ArchivedBallot.event_id)
+        .where(ArchivedBallot.voter_id == current_user.id)
+    )
+    if cursor:
+        query = query.where(keyset_before(Vote.joined_at, Vote.id, cursor))
+        archived_query = archived_query.where(keyset_before(ArchivedBallot.joined_at, ArchivedBallot.vote_id, cursor))
 
-    if not votes:
-        raise HTTPException(status_code=404, detail="No votes found for the current user")
+    live_votes = db.execute(query.order_by(Vote.joined_at.desc(), Vote.id.desc()).limit(limit + 1)).all()
+    archived_votes = db.execute(
+        archived_query.order_by(ArchivedBallot.joined_at.desc(), ArchivedBallot.vote_id.desc()).limit(limit + 1)
+    ).all()
+    votes = sorted(live_votes + archived_votes, key=lambda vote: (vote.joined_at, vote.id), reverse=True)[:limit + 1]
 
-    user_votes = []
-    for vote in votes:
-        event = db.query(Event).filter(Event.id == vote.event_id).first()
-        if not event:
-            continue
+    if not votes and not cursor:
+        raise HTTPException(status_code=404, detail="No votes found for the current user")
 
-        vote_choices = []
-        for vote_option in vote.vote_options:
-            option = db.query(Option).filter(Option.id == vote_option.option_id).first()
-            vote_choices.append({
-                "option_text": option.option_text,
-                "event_option_number": option.event_option_number
-            })
+    votes = paginate(votes, limit, response, lambda vote: (vote.joined_at, vote.id))
 
-        user_votes.append({
-            "event_title": event.title,
-            "event_question": event.question,
-            "event_unique_code": event.unique_code,
-            "vote_choices": vote_choices,
-            "voted_at": vote.joined_at
-        })
+    vote_choices = defaultdict(list)
+    archived = [vote for vote in votes if vote.archived]
+    live_ids = [vote.id for vote in votes if not vote.archived]
+    if live_ids:
+        for vote_id, number, option_text in db.execute(
+            select(VoteOptions.vote_id, Option.event_option_number, Option.option_text)
+            .join(Option, Option.id == VoteOptions.option_id)
+            .where(VoteOptions.vote_id.in_(live_ids))
+            .order_by(VoteOptions.vote_id, Option.event_option_number)
+        ):
+            vote_choices[False, vote_id].append(serializers.option_payload(number, option_text))
+    if archived:
+        option_texts = dict(
+            ((event_id, number), option_text)
+            for event_id, number, option_text in db.execute(
+                select(Option.event_id, Option.event_option_number, Option.option_text)
+                .where(Option.event_id.in_({vote.event_id for vote in archived}))
+            )
+        )
+        for vote in archived:
+            vote_choices[True, vote.id] = [
+                serializers.option_payload(number, option_texts[(vote.event_id, number)])
+                for number in vote.option_numbers
+            ]
 
-    return user_votes
+    return json_response([serializers.user_vote_payload(vote, vote_choices[bool(vote.archived), vote.id]) for vote in votes], response)
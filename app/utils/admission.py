@@ -0,0 +1,146 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from typing import Hashable, Optional
+from fastapi import HTTPException
+from app.config import Settings, get_settings
+
+MAX_TRACKED_KEYS = 100_000
+CONCURRENCY_RETRY_AFTER_SECONDS = 1
+
+class TokenBucketLimiter:
+    """Per-key token buckets: each key may average `rate` requests per second, in bursts of up to `burst`.
+
+    A `rate` of 0 admits everything. Beyond `max_keys`, the least recently seen buckets are
+    dropped; a dropped key simply starts over with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = MAX_TRACKED_KEYS):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        self.rejected = 0
+        self._buckets: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for `key`; return 0 if admitted, else the seconds until one is available."""
+        if self.rate <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                self.rejected += 1
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class ConcurrencyLimiter:
+    """Caps how many requests hold a database session at once.
+
+    A request waits up to `wait_seconds` for a slot and is then turned away with a 503,
+    instead of queueing on the connection pool for DB_POOL_TIMEOUT while holding a worker
+    thread. A `limit` of 0 admits everything.
+    """
+
+    def __init__(self, limit: int, wait_seconds: float):
+        self.limit = limit
+        self.wait_seconds = wait_seconds
+        self.in_flight = 0
+        self.rejected = 0
+        self._slots = BoundedSemaphore(limit) if limit > 0 else None
+        self._lock = Lock()
+
+    def enter(self):
+        if self._slots is None:
+            return
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            self._reject()
+        self._count(1)
+
+    async def enter_async(self):
+        if self._slots is None:
+            return
+        # Only wait off the event loop when every slot is taken.
+        if not self._slots.acquire(blocking=False):
+            if not await asyncio.to_thread(self._slots.acquire, timeout=self.wait_seconds):
+                self._reject()
+        self._count(1)
+
+    def leave(self):
+        if self._slots is None:
+            return
+        self._count(-1)
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        self.enter()
+        try:
+            yield
+        finally:
+            self.leave()
+
+    def _count(self, delta: int):
+        with self._lock:
+            self.in_flight += delta
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again.",
+            headers={"Retry-After": str(CONCURRENCY_RETRY_AFTER_SECONDS)},
+        )
+
+def db_concurrency(settings: Settings) -> int:
+    """ADMISSION_DB_CONCURRENCY, defaulting to what the connection pool can serve without waiting."""
+    if settings.admission_db_concurrency is not None:
+        return settings.admission_db_concurrency
+    return settings.db_pool_size + settings.db_max_overflow
+
+_settings = get_settings()
+user_limiter = TokenBucketLimiter(_settings.admission_user_rate, _settings.admission_user_burst)
+event_limiter = TokenBucketLimiter(_settings.admission_event_rate, _settings.admission_event_burst)
+# The sync and async engines have separate pools of the same size.
+database_slots = ConcurrencyLimiter(db_concurrency(_settings), _settings.admission_db_wait_ms / 1000)
+async_database_slots = ConcurrencyLimiter(db_concurrency(_settings), _settings.admission_db_wait_ms / 1000)
+
+def _too_many_requests(wait: float, detail: str):
+    raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(max(1, math.ceil(wait)))})
+
+def admit_vote(user_id: int, unique_code: Optional[str]):
+    """Raise a 429 if the user, or the event being voted on, is over its request rate."""
+    wait = user_limiter.acquire(user_id)
+    if wait:
+        _too_many_requests(wait, "Too many requests, please slow down.")
+    if unique_code:
+        wait = event_limiter.acquire(unique_code)
+        if wait:
+            _too_many_requests(wait, "This event is receiving too many requests, please try again shortly.")
+
+def stats() -> dict:
+    return {
+        "rejected_user_rate": user_limiter.rejected,
+        "rejected_event_rate": event_limiter.rejected,
+        "rejected_db_concurrency": database_slots.rejected + async_database_slots.rejected,
+        "db_in_flight": database_slots.in_flight,
+        "async_db_in_flight": async_database_slots.in_flight,
+        "db_concurrency_limit": database_slots.limit,
+        "tracked_users": len(user_limiter),
+        "tracked_events": len(event_limiter),
+    }
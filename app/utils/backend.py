@@ -0,0 +1,346 @@
+import asyncio
+import json
+import logging
+import secrets
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+from app.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[Any], None]
+Address = Union[str, Tuple[str, int]]
+
+HUB_SWEEP_INTERVAL_SECONDS = 60
+SUBSCRIBER_RECONNECT_SECONDS = 1
+
+class BackendUnavailable(Exception):
+    pass
+
+class Backend(ABC):
+    """State shared by every worker process: a small key/value store with counters, and pub/sub.
+
+    Values and messages must be JSON-serializable. Subscriber callbacks may run on any thread.
+    """
+
+    instance_id: str
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    def publish(self, channel: str, message: Any):
+        ...
+
+    @abstractmethod
+    def subscribe(self, channel: str, callback: Subscriber):
+        ...
+
+    def close(self):
+        pass
+
+class _Store:
+    """Key/value store with optional per-key expiry; shared by the in-memory backend and the hub."""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._values[key] = (value, None if ttl is None else time.monotonic() + ttl)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value, expires_at = self._values.get(key, (0, None))
+            if expires_at is not None and expires_at <= time.monotonic():
+                value, expires_at = 0, None
+            self._values[key] = (int(value) + 1, expires_at)
+            return int(value) + 1
+
+    def sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, (_, expires_at) in self._values.items() if expires_at is not None and expires_at <= now]:
+                del self._values[key]
+
+class InMemoryBackend(Backend):
+    """Single-process backend: everything lives in this process."""
+
+    def __init__(self):
+        self.instance_id = secrets.token_hex(4)
+        self._store = _Store()
+        self._subscribers: Dict[str, List[Subscriber]] = defaultdict(list)
+
+    def get(self, key: str) -> Any:
+        return self._store.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._store.set(key, value, ttl)
+
+    def incr(self, key: str) -> int:
+        return self._store.incr(key)
+
+    def publish(self, channel: str, message: Any):
+        for callback in list(self._subscribers.get(channel, ())):
+            _deliver(callback, message)
+
+    def subscribe(self, channel: str, callback: Subscriber):
+        self._subscribers[channel].append(callback)
+
+def _deliver(callback: Subscriber, message: Any):
+    try:
+        callback(message)
+    except Exception:
+        logger.exception("Backend subscriber failed")
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+def _connect(address: Address) -> socket.socket:
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.connect(address)
+    return sock
+
+def _hang_up(sock: socket.socket):
+    """Close a socket another thread may be blocked reading from."""
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+
+class SocketBackend(Backend):
+    """Client of a `BackendHub` running on this machine, reached over a Unix or TCP socket.
+
+    Each thread talks to the hub over its own connection, so request threads never wait on
+    each other. Subscriptions share one extra connection, read by a daemon thread that
+    reconnects on its own if the hub restarts.
+    """
+
+    def __init__(self, address: Address):
+        self.address = address
+        self._local = threading.local()
+        self._subscribers: Dict[str, List[Subscriber]] = defaultdict(list)
+        self._subscriber_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._listener_socket: Optional[socket.socket] = None
+        self._closed = False
+        self.instance_id: Optional[str] = None
+        # Connect now so a wrong address fails at startup rather than on the first request.
+        self._request({"op": "hello"})
+
+    def get(self, key: str) -> Any:
+        return self._request({"op": "get", "key": key})["value"]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._request({"op": "set", "key": key, "value": value, "ttl": ttl})
+
+    def incr(self, key: str) -> int:
+        return self._request({"op": "incr", "key": key})["value"]
+
+    def publish(self, channel: str, message: Any):
+        self._request({"op": "publish", "channel": channel, "message": message})
+
+    def subscribe(self, channel: str, callback: Subscriber):
+        with self._subscriber_lock:
+            self._subscribers[channel].append(callback)
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="backend-subscriber", daemon=True)
+                self._listener.start()
+            elif self._listener_socket is not None:
+                # Reconnect so the hub learns about the new channel.
+                _hang_up(self._listener_socket)
+
+    def close(self):
+        self._closed = True
+        if self._listener_socket is not None:
+            _hang_up(self._listener_socket)
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection[0].close()
+
+    def _connection(self) -> Tuple[socket.socket, Any]:
+        """This thread's connection to the hub, opened on first use.
+
+        Every new connection asks the hub for its instance id: a restarted hub starts its counters
+        from zero, and tags built from the old id must stop matching once we reach the new one.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            sock = _connect(self.address)
+            connection = (sock, sock.makefile("rb"))
+            try:
+                instance_id = self._exchange(connection, {"op": "hello"})["instance_id"]
+            except OSError:
+                sock.close()
+                raise
+            if instance_id != self.instance_id:
+                if self.instance_id is not None:
+                    logger.warning("Shared backend hub restarted (instance %s -> %s)", self.instance_id, instance_id)
+                self.instance_id = instance_id
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _exchange(connection: Tuple[socket.socket, Any], message: dict) -> dict:
+        connection[0].sendall(_encode(message))
+        line = connection[1].readline()
+        if not line:
+            raise ConnectionError("backend hub closed the connection")
+        return json.loads(line)
+
+    def _request(self, message: dict) -> dict:
+        for attempt in range(2):
+            connection = None
+            try:
+                connection = self._connection()
+                return self._exchange(connection, message)
+            except OSError as exc:
+                if connection is not None:
+                    connection[0].close()
+                self._local.connection = None
+                if attempt:
+                    raise BackendUnavailable(f"Shared backend at {self.address!r} is unreachable") from exc
+
+    def _listen(self):
+        while not self._closed:
+            try:
+                sock = _connect(self.address)
+                with self._subscriber_lock:
+                    self._listener_socket = sock
+                    channels = list(self._subscribers)
+                sock.sendall(_encode({"op": "subscribe", "channels": channels}))
+                for line in sock.makefile("rb"):
+                    message = json.loads(line)
+                    if "channel" not in message:
+                        continue
+                    for callback in list(self._subscribers.get(message["channel"], ())):
+                        _deliver(callback, message["message"])
+            except OSError:
+                pass
+            if not self._closed:
+                time.sleep(SUBSCRIBER_RECONNECT_SECONDS)
+
+class BackendHub:
+    """The process every `SocketBackend` connects to. Run with `python -m app.cli backend-hub`.
+
+    Speaks newline-delimited JSON: one response line per request line, except on connections
+    that subscribed, which then only receive published messages.
+    """
+
+    def __init__(self):
+        self.instance_id = secrets.token_hex(4)
+        self._store = _Store()
+        self._subscribers: Dict[str, set] = defaultdict(set)
+
+    def apply(self, message: dict) -> dict:
+        op = message.get("op")
+        if op == "hello":
+            return {"instance_id": self.instance_id}
+        if op == "get":
+            return {"value": self._store.get(message["key"])}
+        if op == "set":
+            self._store.set(message["key"], message["value"], message.get("ttl"))
+            return {}
+        if op == "incr":
+            return {"value": self._store.incr(message["key"])}
+        if op == "publish":
+            payload = _encode({"channel": message["channel"], "message": message["message"]})
+            receivers = self._subscribers.get(message["channel"], ())
+            for writer in receivers:
+                writer.write(payload)
+            return {"receivers": len(receivers)}
+        return {"error": f"unknown op {op!r}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message.get("op") == "subscribe":
+                    for channel in message["channels"]:
+                        self._subscribers[channel].add(writer)
+                    continue
+                writer.write(_encode(self.apply(message)))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for subscribers in self._subscribers.values():
+                subscribers.discard(writer)
+            writer.close()
+
+    async def serve(self, address: Address):
+        if isinstance(address, str):
+            server = await asyncio.start_unix_server(self.handle, path=address)
+        else:
+            server = await asyncio.start_server(self.handle, *address)
+        async with server:
+            while True:
+                await asyncio.sleep(HUB_SWEEP_INTERVAL_SECONDS)
+                self._store.sweep()
+
+def parse_backend_url(url: str) -> Optional[Address]:
+    """`memory://` -> None, `unix:///path/to.sock` -> path, `tcp://host:port` -> (host, port)."""
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return None
+    if parsed.scheme == "unix":
+        return parsed.path
+    if parsed.scheme == "tcp":
+        return parsed.hostname or "127.0.0.1", parsed.port
+    raise ValueError(f"Unsupported shared backend URL {url!r}; use memory://, unix:///path or tcp://host:port")
+
+_backend: Optional[Backend] = None
+_backend_lock = threading.Lock()
+
+def init_backend(settings: Optional[Settings] = None) -> Backend:
+    """Connect to the backend named by SHARED_BACKEND_URL once per process."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            address = parse_backend_url((settings or get_settings()).shared_backend_url)
+            _backend = InMemoryBackend() if address is None else SocketBackend(address)
+    return _backend
+
+def get_backend() -> Backend:
+    return _backend or init_backend()
+
+def close_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
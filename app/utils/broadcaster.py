@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_UPDATES_PER_SECOND = 2
+
+class Subscription:
+    """A viewer of one event. Holds only the latest snapshot, so a slow reader is downsampled instead of buffered."""
+
+    def __init__(self, key):
+        self.key = key
+        self.skipped = 0
+        self._latest: Optional[dict] = None
+        self._ready = asyncio.Event()
+
+    def offer(self, snapshot: dict):
+        if self._ready.is_set():
+            self.skipped += 1
+        self._latest = snapshot
+        self._ready.set()
+
+    async def next(self) -> dict:
+        await self._ready.wait()
+        self._ready.clear()
+        return self._latest
+
+class _Channel:
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self.dirty = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+class ResultBroadcaster:
+    """In-process fan-out of event results.
+
+    Writers call `notify(key)` after they commit. Bursts of notifications are coalesced so
+    `fetch(key)` runs at most `max_updates_per_second` times per event, no matter how many
+    viewers are subscribed. Events nobody watches cost a dict lookup per notification.
+    """
+
+    def __init__(self, fetch: Callable[[Any], dict], max_updates_per_second: float = DEFAULT_MAX_UPDATES_PER_SECOND):
+        self.fetch = fetch
+        self.min_interval = 1.0 / max_updates_per_second
+        self.aggregations = 0
+        self._channels: Dict[Any, _Channel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, key) -> Subscription:
+        """Register a viewer; must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel()
+        subscription = Subscription(key)
+        channel.subscribers.add(subscription)
+        # New viewers need the current state right away.
+        channel.dirty.set()
+        if channel.task is None:
+            channel.task = self._loop.create_task(self._run(key, channel))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        channel = self._channels.get(subscription.key)
+        if channel is not None:
+            channel.subscribers.discard(subscription)
+            if not channel.subscribers:
+                # Wake the publisher so it notices it has nobody left to serve.
+                channel.dirty.set()
+
+    def notify(self, key):
+        """Mark an event's results as changed. Safe to call from worker threads."""
+        loop = self._loop
+        channel = self._channels.get(key)
+        if loop is None or channel is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(channel.dirty.set)
+
+    def subscriber_count(self, key=None) -> int:
+        if key is not None:
+            channel = self._channels.get(key)
+            return len(channel.subscribers) if channel else 0
+        return sum(len(channel.subscribers) for channel in self._channels.values())
+
+    async def _run(self, key, channel: _Channel):
+        try:
+            while True:
+                await channel.dirty.wait()
+                channel.dirty.clear()
+                if not channel.subscribers:
+                    break
+
+                try:
+                    snapshot = await asyncio.to_thread(self.fetch, key)
+                except Exception:
+                    logger.exception("Failed to fetch results for %r", key)
+                else:
+                    self.aggregations += 1
+                    for subscription in list(channel.subscribers):
+                        subscription.offer(snapshot)
+
+                await asyncio.sleep(self.min_interval)
+        finally:
+            if self._channels.get(key) is channel:
+                del self._channels[key]
+            channel.task = None
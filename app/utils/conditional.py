@@ -0,0 +1,19 @@
+from typing import Optional
+from fastapi import Request, Response
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names `etag` (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip_weak = lambda tag: tag[2:] if tag.startswith("W/") else tag
+    return strip_weak(etag) in (strip_weak(tag.strip()) for tag in if_none_match.split(","))
+
+def conditional_get(request: Request, response: Response, etag: str, cache_control: str) -> Optional[Response]:
+    """Set validators on `response`; return a 304 to send instead if the client's copy is current."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,110 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import base64
+import hmac
+from hashlib import sha256
+from threading import BoundedSemaphore, Lock
+from typing import Optional
+import logging
+import bcrypt
+from fastapi import HTTPException
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = get_settings().password_bcrypt_rounds
+HASH_WORKERS = get_settings().password_hash_workers
+HASH_MAX_PENDING = get_settings().password_hash_max_pending
+HASH_RETRY_AFTER_SECONDS = 1
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = Lock()
+_pending = BoundedSemaphore(HASH_MAX_PENDING)
+
+def _bcrypt_input(password: str) -> bytes:
+    """bcrypt only takes 72 bytes; longer passwords are reduced to a base64 SHA-256 digest (44 bytes) first."""
+    encoded = password.encode()
+    if len(encoded) > BCRYPT_MAX_PASSWORD_BYTES:
+        return base64.b64encode(sha256(encoded).digest())
+    return encoded
+
+def _bcrypt_hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(_bcrypt_input(password), bcrypt.gensalt(rounds)).decode()
+
+def _bcrypt_verify(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(_bcrypt_input(password), hashed.encode())
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Spawned workers do not inherit the server's threads or open connections.
+                _executor = ProcessPoolExecutor(
+                    max_workers=HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+def _discard_executor(broken: ProcessPoolExecutor):
+    """Drop a pool whose worker died, unless another request has already replaced it."""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, please try again.",
+        headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)},
+    )
+
+def _run_in_pool(fn, *args):
+    """Run a hash in the worker pool, rejecting the request when too many are already queued.
+
+    A worker that dies (OOM kill, crash) breaks the whole pool; it is replaced and the hash retried once.
+    """
+    if not _pending.acquire(blocking=False):
+        raise _busy()
+    try:
+        for _ in range(2):
+            executor = get_executor()
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                logger.warning("Password hashing pool broke; starting a new one", exc_info=True)
+                _discard_executor(executor)
+        raise _busy()
+    finally:
+        _pending.release()
+
+def hash_password(password: str) -> str:
+    return _run_in_pool(_bcrypt_hash, password, BCRYPT_ROUNDS)
+
+def verify_password(password: str, hashed: str) -> bool:
+    if is_legacy_hash(hashed):
+        return hmac.compare_digest(sha256(password.encode()).hexdigest(), hashed)
+    return _run_in_pool(_bcrypt_verify, password, hashed)
+
+def is_legacy_hash(hashed: str) -> bool:
+    """Passwords stored before bcrypt are bare SHA-256 hex digests."""
+    return len(hashed) == 64 and all(char in "0123456789abcdef" for char in hashed)
+
+def needs_rehash(hashed: str) -> bool:
+    if is_legacy_hash(hashed):
+        return True
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
@@ -1,18 +1,109 @@
 from jose import JWTError, jwt
+import logging
 import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
 from fastapi import HTTPException
+from app.config import Settings, get_settings
+from app.utils.backend import BackendUnavailable, get_backend
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
-SECRET_KEY = secrets.token_urlsafe(32)
 ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
+VERIFIED_TOKEN_CACHE_SIZE = 50_000
+VERIFIED_TOKEN_CACHE_TTL_SECONDS = 300
+REVOCATION_CACHE_SIZE = 50_000
+REVOCATION_CACHE_TTL_SECONDS = 30
+REVOCATION_CHANNEL = "token-revocations"
+EPHEMERAL_KID = "ephemeral"
+
+def load_signing_keys(settings: Settings) -> Tuple[str, Dict[str, str]]:
+    """Parse JWT_SIGNING_KEYS (`kid:secret,kid:secret`) and pick the key new tokens are signed with."""
+    if not settings.jwt_signing_keys:
+        logger.warning(
+            "JWT_SIGNING_KEYS is not set; using a random key. Tokens will not survive a restart "
+            "or work across worker processes."
+        )
+        return EPHEMERAL_KID, {EPHEMERAL_KID: secrets.token_urlsafe(32)}
+
+    keys = {}
+    for entry in settings.jwt_signing_keys.split(","):
+        kid, separator, secret = entry.strip().partition(":")
+        if not separator or not kid or not secret:
+            raise ValueError("JWT_SIGNING_KEYS must look like 'kid1:secret1,kid2:secret2'")
+        keys[kid] = secret
+
+    active_kid = settings.jwt_active_kid or next(iter(keys))
+    if active_kid not in keys:
+        raise ValueError(f"JWT_ACTIVE_KID {active_kid!r} is not one of JWT_SIGNING_KEYS")
+    return active_kid, keys
+
+ACTIVE_KID, SIGNING_KEYS = load_signing_keys(get_settings())
 
-def create_access_token(data: dict):
+verified_tokens = TTLCache(maxsize=VERIFIED_TOKEN_CACHE_SIZE, ttl=VERIFIED_TOKEN_CACHE_TTL_SECONDS)
+
+# user id -> unix time before which their tokens are rejected. Mirrors the shared backend,
+# which holds the authoritative cutoffs; kept short-lived in case a broadcast is missed.
+revoked_before = TTLCache(maxsize=REVOCATION_CACHE_SIZE, ttl=REVOCATION_CACHE_TTL_SECONDS)
+_NOT_REVOKED = 0.0
+REVOCATION_FAIL_OPEN = get_settings().revocation_fail_open
+REVOCATION_RETRY_AFTER_SECONDS = 1
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    issued_at = datetime.now(timezone.utc)
+    expire = issued_at + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"iat": issued_at.timestamp(), "exp": int(expire.timestamp())})
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEYS[ACTIVE_KID], algorithm=ALGORITHM, headers={"kid": ACTIVE_KID})
     return encoded_jwt
 
 def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
+    """Verify a token, skipping signature verification for tokens verified recently."""
+    payload = verified_tokens.get(token)
+    if payload is None:
+        try:
+            key = SIGNING_KEYS.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                # Signed with a key that has been rotated out, or not one of ours at all.
+                raise JWTError("Unknown signing key")
+            payload = jwt.decode(token, key, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            verified_tokens.set(token, payload, ttl=min(remaining, verified_tokens.ttl))
+    elif payload.get("exp", 0) <= time.time():
         raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
+def revoke_user_tokens(user_id: int):
+    """Invalidate every token issued to a user so far, in every worker, without a per-request DB lookup."""
+    cutoff = time.time()
+    get_backend().set(f"revoked-before:{user_id}", cutoff, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    get_backend().publish(REVOCATION_CHANNEL, {"uid": user_id, "cutoff": cutoff})
+
+def on_revocation(message: dict):
+    """Backend subscriber that applies revocations made by other workers right away."""
+    revoked_before.set(message["uid"], message["cutoff"])
+
+def is_revoked(payload: dict) -> bool:
+    user_id = payload.get("uid")
+    cutoff = revoked_before.get(user_id)
+    if cutoff is None:
+        try:
+            cutoff = get_backend().get(f"revoked-before:{user_id}") or _NOT_REVOKED
+        except BackendUnavailable:
+            # Cutoffs this worker already holds still apply; anyone else cannot be checked.
+            logger.warning("Shared backend unavailable; cannot check revocations of user %s", user_id)
+            if REVOCATION_FAIL_OPEN:
+                return False
+            raise HTTPException(
+                status_code=503,
+                detail="Cannot verify the session right now, please try again.",
+                headers={"Retry-After": str(REVOCATION_RETRY_AFTER_SECONDS)},
+            )
+        revoked_before.set(user_id, cutoff)
+    return cutoff != _NOT_REVOKED and payload.get("iat", 0) <= cutoff
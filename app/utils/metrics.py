@@ -0,0 +1,194 @@
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class RequestStats:
+    """SQL issued while serving one request."""
+    __slots__ = ("statements", "db_time", "recorded")
+
+    def __init__(self, record_statements: bool = False):
+        self.statements = 0
+        self.db_time = 0.0
+        self.recorded: Optional[List[str]] = [] if record_statements else None
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("livevote_request_stats", default=None)
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._requests: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self._latency: Dict[Tuple[str, str], _Histogram] = {}
+        self._statements: Dict[Tuple[str, str], _Histogram] = {}
+        self._db_time: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._background_statements = 0
+        self._background_db_time = 0.0
+        self._sources: List[Tuple[str, Callable[[], Optional[dict]]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, duration: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self._requests[(method, route, str(status))] += 1
+            if key not in self._latency:
+                self._latency[key] = _Histogram(LATENCY_BUCKETS)
+                self._statements[key] = _Histogram(STATEMENT_BUCKETS)
+            self._latency[key].observe(duration)
+            self._statements[key].observe(stats.statements)
+            self._db_time[key] += stats.db_time
+
+    def observe_background_statement(self, duration: float):
+        with self._lock:
+            self._background_statements += 1
+            self._background_db_time += duration
+
+    def register_source(self, prefix: str, source: Callable[[], Optional[dict]]):
+        """Export the numeric values of `source()` as `livevote_<prefix>_<key>` gauges."""
+        self._sources.append((prefix, source))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP livevote_http_requests_total HTTP requests by route template and status.",
+                "# TYPE livevote_http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f'livevote_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+            lines += _render_histograms(
+                "livevote_http_request_duration_seconds", "Request latency by route template.", self._latency,
+            )
+            lines += _render_histograms(
+                "livevote_http_sql_statements", "SQL statements issued per request by route template.", self._statements,
+            )
+
+            lines += [
+                "# HELP livevote_http_db_seconds_total Time spent in SQL by route template.",
+                "# TYPE livevote_http_db_seconds_total counter",
+            ]
+            for (method, route), seconds in sorted(self._db_time.items()):
+                lines.append(f'livevote_http_db_seconds_total{{method="{method}",route="{route}"}} {seconds:.6f}')
+
+            lines += [
+                "# HELP livevote_background_sql_statements_total SQL statements issued outside requests.",
+                "# TYPE livevote_background_sql_statements_total counter",
+                f"livevote_background_sql_statements_total {self._background_statements}",
+                "# HELP livevote_background_db_seconds_total Time spent in SQL outside requests.",
+                "# TYPE livevote_background_db_seconds_total counter",
+                f"livevote_background_db_seconds_total {self._background_db_time:.6f}",
+            ]
+
+        for prefix, source in self._sources:
+            values = source() or {}
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"livevote_{prefix}_{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+def _render_histograms(name: str, help_text: str, histograms: Dict[Tuple[str, str], _Histogram]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(histograms.items()):
+        labels = f'method="{method}",route="{route}"'
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+registry = MetricsRegistry()
+
+def instrument_engine(engine: Engine):
+    """Attribute every statement run on `engine` to the request being served, if any."""
+
+    @sqlalchemy_event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("livevote_query_start", []).append(time.perf_counter())
+
+    @sqlalchemy_event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["livevote_query_start"].pop()
+        stats = _current_request.get()
+        if stats is None:
+            registry.observe_background_statement(duration)
+            return
+        stats.statements += 1
+        stats.db_time += duration
+        if stats.recorded is not None:
+            stats.recorded.append(statement)
+
+    @sqlalchemy_event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("livevote_query_start"):
+            connection.info["livevote_query_start"].pop()
+
+class MetricsMiddleware:
+    """ASGI middleware recording count, latency and SQL usage per route template.
+
+    With `debug` on, any request issuing more than `query_budget` statements is logged
+    together with its statements.
+    """
+
+    def __init__(self, app, debug: bool = False, query_budget: int = 20):
+        self.app = app
+        self.debug = debug
+        self.query_budget = query_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(record_statements=self.debug)
+        token = _current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            _current_request.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            registry.observe_request(scope["method"], route_path, status, duration, stats)
+            if self.debug and stats.statements > self.query_budget:
+                logger.warning(
+                    "%s %s issued %d SQL statements (budget %d) in %.1f ms:\n%s",
+                    scope["method"], route_path, stats.statements, self.query_budget, duration * 1000,
+                    "\n".join(stats.recorded),
+                )
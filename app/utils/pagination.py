@@ -0,0 +1,38 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Encode the (sort value, id) of the last row on a page as an opaque cursor."""
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_before(sort_column, id_column, cursor: str):
+    """Filter for rows after the cursor in a (sort_column DESC, id_column DESC) ordering."""
+    sort_value, row_id = decode_cursor(cursor)
+    return or_(
+        sort_column < sort_value,
+        and_(sort_column == sort_value, id_column < row_id),
+    )
+
+def paginate(rows: list, limit: int, response: Response, cursor_of) -> list:
+    """Trim a `limit + 1` result to one page and advertise the next cursor, if any."""
+    page = rows[:limit]
+    if len(rows) > limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*cursor_of(page[-1]))
+    return page
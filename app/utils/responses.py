@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode plain dicts/lists/datetimes to JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for payloads already shaped like the response model; skips jsonable_encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def json_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """Return `content` as-is, bypassing response_model validation, with headers set on the injected `response`."""
+    rendered = FastJSONResponse(content, status_code=status_code)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-type"):
+                rendered.headers.append(name, value)
+    return rendered
@@ -0,0 +1,138 @@
+"""Load-test the LiveVote API in-process against a local database.
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Database to run against (default: a fresh SQLite file)")
+    parser.add_argument("--scenarios", default="vote-burst,result-polling,home-history,login-storm",
+                        help="Comma separated scenarios to run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients per scenario")
+    parser.add_argument("--requests", type=int, default=500, help="Requests for the polling and history scenarios")
+    parser.add_argument("--voters", type=int, default=500, help="Voters in the vote burst, and ballots in the polled event")
+    parser.add_argument("--history", type=int, default=200, help="Past votes of the user in the history scenario")
+    parser.add_argument("--logins", type=int, default=100, help="Users in the login storm")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results previously written with --output")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative regression of throughput and p95 before failing")
+    return parser.parse_args(argv)
+
+async def run_scenario(app, name, jobs, concurrency, statement_counter):
+    import httpx
+    from benchmarks.stats import summarize
+
+    latencies = []
+
+    async def record(request):
+        started = time.perf_counter()
+        response = await request
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: {response.request.method} {response.request.url.path} "
+                               f"answered {response.status_code}: {response.text}")
+        return response
+
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                await queue.get_nowait()(client, record)
+
+        statement_counter.reset()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(name, latencies, elapsed, statement_counter.count)
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def reset(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+async def run(args):
+    from sqlalchemy import event as sqlalchemy_event
+    from app.db.database import create_schema, init_engine
+    from app.main import app
+    from benchmarks.scenarios import SCENARIOS
+
+    engine = init_engine()
+    create_schema(engine)
+    counter = StatementCounter()
+    sqlalchemy_event.listen(engine, "before_cursor_execute", counter)
+
+    results = []
+    async with app.router.lifespan_context(app):
+        for name in args.scenarios.split(","):
+            jobs = SCENARIOS[name](args)
+            results.append(await run_scenario(app, name, jobs, args.concurrency, counter))
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of `results` against `baseline`, as printable lines."""
+    previous = {row["scenario"]: row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        before = previous.get(row["scenario"])
+        if before is None:
+            continue
+        if row["requests_per_sec"] < before["requests_per_sec"] * (1 - tolerance):
+            regressions.append(f"{row['scenario']}: throughput {before['requests_per_sec']} -> {row['requests_per_sec']} req/s")
+        if row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{row['scenario']}: p95 {before['p95_ms']} -> {row['p95_ms']} ms")
+        if row["sql_per_request"] > before["sql_per_request"]:
+            regressions.append(f"{row['scenario']}: SQL/request {before['sql_per_request']} -> {row['sql_per_request']}")
+    return regressions
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    elif "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='livevote-bench-')}/bench.db"
+
+    results = asyncio.run(run(args))
+
+    print(f"{'scenario':<16} {'requests':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'SQL/req':>8}")
+    for row in results:
+        print(f"{row['scenario']:<16} {row['requests']:>8} {row['requests_per_sec']:>9} {row['p50_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['sql_per_request']:>8}")
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+        config["database_url"] = os.environ["DATABASE_URL"]
+        with open(args.output, "w") as output:
+            json.dump({"config": config, "results": results}, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Fire the same ballot from many threads at once and check that exactly one is accepted.
+
+Run from the repository root against the configured database, e.g. a local SQLite file:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.concurrent_vote --parallel 32
+
+All submissions come from one user, so the per-user admission limit is switched off unless
+ADMISSION_USER_RATE is set; otherwise everything past ADMISSION_USER_BURST would be answered 429.
+"""
+import argparse
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Barrier
+
+PASSWORD = "benchmark1"
+
+def register_and_login(client, email: str) -> dict:
+    client.post("/auth/register", json={"email": email, "password": PASSWORD, "name": "Benchmark"})
+    response = client.post("/auth/login", data={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--parallel", type=int, default=16, help="Number of identical concurrent submissions")
+    args = parser.parse_args(argv)
+
+    # Admission settings are read when the app is imported.
+    os.environ.setdefault("ADMISSION_USER_RATE", "0")
+    from fastapi.testclient import TestClient
+    from app.db.database import SessionLocal, create_schema, Event, Option, VoteOptions
+    from app.main import app
+
+    create_schema()
+    run_id = uuid.uuid4().hex[:8]
+    client = TestClient(app)
+    with client:
+        creator = register_and_login(client, f"creator-{run_id}@bench.local")
+        voter = register_and_login(client, f"voter-{run_id}@bench.local")
+
+        response = client.post("/events/create", headers=creator, json={
+            "title": f"Concurrency {run_id}",
+            "question": "Which one?",
+            "options": ["A", "B", "C"],
+            "allow_multiple_votes": True,
+            "end_date": (datetime.now() + timedelta(days=1)).isoformat(),
+        })
+        response.raise_for_status()
+        unique_code = response.json()["unique_code"]
+        client.post("/events/join", headers=voter, json={"unique_code": unique_code}).raise_for_status()
+
+        barrier = Barrier(args.parallel)
+
+        def submit(_):
+            barrier.wait()
+            return client.post("/events/cast-vote", headers=voter, json={
+                "unique_code": unique_code,
+                "event_option_numbers": [1, 2],
+            }).status_code
+
+        with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+            statuses = list(pool.map(submit, range(args.parallel)))
+
+        accepted = statuses.count(200)
+        rejected = statuses.count(400)
+        throttled = statuses.count(429) + statuses.count(503)
+
+        db = SessionLocal()
+        try:
+            options = db.query(Option).join(Event).filter(Event.unique_code == unique_code).all()
+            option_ids = [option.id for option in options]
+            ballots = db.query(VoteOptions).filter(VoteOptions.option_id.in_(option_ids)).count()
+            counters = sum(option.vote_count for option in options)
+        finally:
+            db.close()
+
+    print(f"submissions={args.parallel} accepted={accepted} rejected={rejected} throttled={throttled} "
+          f"vote_options_rows={ballots} counter_total={counters}")
+
+    if throttled:
+        print("FAILED: admission control turned submissions away before they raced; "
+              "raise ADMISSION_USER_BURST / ADMISSION_DB_CONCURRENCY or unset ADMISSION_USER_RATE")
+        return 1
+    ok = accepted == 1 and rejected == args.parallel - 1 and ballots == 2 and counters == 2
+    print("OK" if ok else "FAILED: expected exactly one accepted ballot")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Measure event creation throughput for events with many options.
+
+Run from the repository root against the configured database, e.g. a local SQLite file:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.create_event --events 200 --options 20
+    python -m benchmarks.create_event --events 200 --options 20 --legacy
+"""
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from app.db.database import SessionLocal, create_schema, Event, Option, User
+from app.models import event
+from app.models.schemas import EventCreate
+
+def create_event_legacy(db, event_data: EventCreate, user_id: int):
+    """The previous code path: commit the event, then one count/commit/refresh per option."""
+    new_event = Event(
+        creator_id=user_id,
+        title=event_data.title,
+        question=event_data.question,
+        allow_multiple_votes=event_data.allow_multiple_votes,
+        end_date=event_data.end_date,
+        unique_code=event.generate_unique_code(),
+    )
+    db.add(new_event)
+    db.commit()
+    db.refresh(new_event)
+    for option_text in event_data.options:
+        max_number = db.query(Option).filter(Option.event_id == new_event.id).count()
+        new_option = Option(event_id=new_event.id, option_text=option_text, event_option_number=max_number + 1)
+        db.add(new_option)
+        db.commit()
+        db.refresh(new_option)
+    return new_event
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100, help="Number of events to create")
+    parser.add_argument("--options", type=int, default=20, help="Options per event")
+    parser.add_argument("--legacy", action="store_true", help="Use the per-option commit path for comparison")
+    args = parser.parse_args(argv)
+
+    create_schema()
+    run_id = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        creator = User(email=f"creator-{run_id}@bench.local", name="Benchmark", password="-")
+        db.add(creator)
+        db.commit()
+
+        event_data = EventCreate(
+            title=f"Benchmark {run_id}",
+            question="Which one?",
+            options=[f"Option {number}" for number in range(1, args.options + 1)],
+            allow_multiple_votes=False,
+            end_date=(datetime.now() + timedelta(days=1)).isoformat(),
+        )
+        create = create_event_legacy if args.legacy else event.create_event
+
+        started = time.perf_counter()
+        for _ in range(args.events):
+            create(db, event_data, creator.id)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+
+    mode = "legacy" if args.legacy else "bulk"
+    print(f"mode={mode} events={args.events} options_per_event={args.options} "
+          f"elapsed={elapsed:.3f}s events_per_sec={args.events / elapsed:.1f} "
+          f"options_per_sec={args.events * args.options / elapsed:.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
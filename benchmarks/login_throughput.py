@@ -0,0 +1,43 @@
+"""Measure password verification throughput of the hashing worker pool.
+
+Run from the repository root:
+
+    PASSWORD_BCRYPT_ROUNDS=12 python -m benchmarks.login_throughput --logins 200
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.utils import hashing
+
+PASSWORD = "benchmark1"
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100, help="Number of password verifications")
+    parser.add_argument("--concurrency", type=int, default=hashing.HASH_MAX_PENDING, help="Concurrent login requests")
+    args = parser.parse_args(argv)
+
+    hashed = hashing.hash_password(PASSWORD)
+    # Warm every worker so process start-up is not part of the measurement.
+    with ThreadPoolExecutor(max_workers=hashing.HASH_WORKERS) as threads:
+        list(threads.map(lambda _: hashing.verify_password(PASSWORD, hashed), range(hashing.HASH_WORKERS)))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as threads:
+        results = list(threads.map(lambda _: hashing.verify_password(PASSWORD, hashed), range(args.logins)))
+    elapsed = time.perf_counter() - started
+    hashing.shutdown_executor()
+
+    if not all(results):
+        print("FAILED: a verification returned False")
+        return 1
+
+    per_second = args.logins / elapsed
+    print(f"rounds={hashing.BCRYPT_ROUNDS} workers={hashing.HASH_WORKERS} logins={args.logins} "
+          f"elapsed={elapsed:.3f}s logins_per_sec={per_second:.1f} "
+          f"logins_per_sec_per_core={per_second / hashing.HASH_WORKERS:.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Check that the hot routes never make the database scan a whole table.
+
+Seeds a database, drives join_event, cast_vote, get_event_result, get_dashboard and get_user_votes
+in-process, records every statement they issue and asks the database to EXPLAIN each one. Exits
+non-zero if any plan reads a whole table or index (SQLite `SCAN <table>`, MySQL `type=ALL`/`index`).
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --database-url mysql+pymysql://root:@localhost/livevote_plans
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from typing import List, Tuple
+
+# A scan through an index still reads every row; only SEARCH narrows the rows read.
+SQLITE_TABLE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+MYSQL_FULL_SCAN_TYPES = ("ALL", "index")
+
+class StatementRecorder:
+    def __init__(self):
+        self.statements: List[Tuple[str, object]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.statements.append((statement, parameters))
+
+    def take(self) -> List[Tuple[str, object]]:
+        statements, self.statements = self.statements, []
+        return statements
+
+def explainable(statement: str) -> bool:
+    """Statements that read a table: SELECTs, UPDATE/DELETE and INSERT ... SELECT, not plain INSERTs."""
+    words = statement.lstrip().split(None, 1)
+    if not words:
+        return False
+    verb = words[0].upper()
+    if verb in ("SELECT", "UPDATE", "DELETE"):
+        return True
+    return verb == "INSERT" and re.search(r"\bSELECT\b", statement, re.IGNORECASE) is not None
+
+def full_scans(conn, statement: str, parameters) -> List[str]:
+    """Tables the database plans to read in full for `statement`."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        return [match.group(1) for match in (SQLITE_TABLE_SCAN.match(row[3]) for row in rows) if match]
+    rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+    return [row["table"] for row in rows if row["type"] in MYSQL_FULL_SCAN_TYPES]
+
+def drive_routes(client, recorder, unique_code, creator, voter, historian) -> List[Tuple[str, List[Tuple[str, object]]]]:
+    from app.models.event import event_cache
+    from app.models.results import result_cache
+
+    def call(method, path, headers, **kwargs):
+        # Start cold so the lookups the caches normally absorb are checked too.
+        event_cache.clear()
+        result_cache.clear()
+        recorder.take()
+        response = client.request(method, path, headers=headers, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path} answered {response.status_code}: {response.text}")
+        return recorder.take()
+
+    return [
+        ("join_event", call("POST", "/events/join", voter, json={"unique_code": unique_code})),
+        ("cast_vote", call("POST", "/events/cast-vote", voter, json={
+            "unique_code": unique_code, "event_option_numbers": [2],
+        })),
+        ("get_event_result", call("POST", "/events/result", creator, json={"unique_code": unique_code})),
+        ("get_event_result", call("GET", f"/events/{unique_code}/result", creator)),
+        ("get_dashboard", call("GET", "/events/dashboard", creator)),
+        ("get_user_votes", call("GET", "/home/retrieve", historian)),
+    ]
+
+def explain_routes(engine, client, voters: int, history: int) -> List[Tuple[str, str, List[str]]]:
+    """Seed, drive the hot routes through `client` and EXPLAIN what they ran.
+
+    Returns (route, statement, fully scanned tables) for every explainable statement.
+    """
+    from sqlalchemy import event as sqlalchemy_event
+    from benchmarks.seed import seed_event, seed_history
+
+    historian = seed_history(history)
+    unique_code, creator, seeded_voters = seed_event(voters)
+
+    recorder = StatementRecorder()
+    sqlalchemy_event.listen(engine, "before_cursor_execute", recorder)
+    try:
+        routes = drive_routes(client, recorder, unique_code, creator.headers, seeded_voters[0].headers, historian.headers)
+    finally:
+        sqlalchemy_event.remove(engine, "before_cursor_execute", recorder)
+
+    plans = []
+    with engine.connect() as conn:
+        for route, statements in routes:
+            for statement, parameters in statements:
+                if explainable(statement):
+                    plans.append((route, statement, full_scans(conn, statement, parameters)))
+    return plans
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Database to check (default: a fresh SQLite file)")
+    parser.add_argument("--voters", type=int, default=500, help="Voters seeded on the checked event")
+    parser.add_argument("--history", type=int, default=200, help="Events seeded in the voter's history")
+    parser.add_argument("--verbose", action="store_true", help="Print every statement, not only the failing ones")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    elif "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='livevote-plans-')}/plans.db"
+    # Keep the background finalizer's statements out of the routes' recordings.
+    os.environ["RESULT_FINALIZE_INTERVAL_SECONDS"] = "0"
+
+    from fastapi.testclient import TestClient
+    from app.db.database import create_schema, init_engine
+    from app.main import app
+
+    engine = init_engine()
+    create_schema(engine)
+    with TestClient(app) as client:
+        plans = explain_routes(engine, client, args.voters, args.history)
+
+    failures = 0
+    current_route = None
+    for route, statement, scanned in plans:
+        if route != current_route:
+            current_route = route
+            print(f"{route}: {sum(1 for plan in plans if plan[0] == route)} statement(s) explained")
+        if scanned:
+            failures += 1
+        if scanned or args.verbose:
+            label = f"FULL SCAN of {', '.join(scanned)}" if scanned else "ok"
+            print(f"  {label}: {' '.join(statement.split())}")
+
+    if failures:
+        print(f"FAIL: {failures} statement(s) read a whole table.")
+        return 1
+    print("OK: every statement uses an index.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
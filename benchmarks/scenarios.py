@@ -0,0 +1,54 @@
+"""Load scenarios. Each returns a list of jobs; a job is an async callable run as `await job(client, record)`."""
+import random
+from benchmarks import seed
+
+def vote_burst(args):
+    """Every voter joins one freshly revealed event and casts a ballot right away."""
+    unique_code, _, voters = seed.seed_event(args.voters)
+
+    def job_for(voter):
+        async def job(client, record):
+            await record(client.post("/events/join", headers=voter.headers, json={"unique_code": unique_code}))
+            await record(client.post("/events/cast-vote", headers=voter.headers, json={
+                "unique_code": unique_code,
+                "event_option_numbers": [random.randint(1, seed.OPTION_COUNT)],
+            }))
+        return job
+
+    return [job_for(voter) for voter in voters]
+
+def result_polling(args):
+    """The creator's dashboard polls the results of an event with ballots in it."""
+    unique_code, creator, _ = seed.seed_event(args.voters, voted=True)
+
+    async def job(client, record):
+        await record(client.post("/events/result", headers=creator.headers, json={"unique_code": unique_code}))
+
+    return [job] * args.requests
+
+def home_history(args):
+    """A voter with a long voting history opens the home screen."""
+    voter = seed.seed_history(args.history)
+
+    async def job(client, record):
+        await record(client.get("/home/retrieve", headers=voter.headers))
+
+    return [job] * args.requests
+
+def login_storm(args):
+    """Many users log in at once, e.g. at the start of a class."""
+    users = seed.seed_login_users(args.logins)
+
+    def job_for(user):
+        async def job(client, record):
+            await record(client.post("/auth/login", data={"email": user.email, "password": seed.PASSWORD}))
+        return job
+
+    return [job_for(user) for user in users]
+
+SCENARIOS = {
+    "vote-burst": vote_burst,
+    "result-polling": result_polling,
+    "home-history": home_history,
+    "login-storm": login_storm,
+}
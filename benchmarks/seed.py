@@ -0,0 +1,102 @@
+"""Seed users, events and ballots directly through the ORM, at benchmark scale."""
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, NamedTuple
+from sqlalchemy import insert, select, update
+from app.db.database import SessionLocal, Event, Option, User, Vote, VoteOptions
+from app.models import event
+from app.models.schemas import EventCreate
+from app.utils import hashing
+from app.utils.jwt_utils import create_access_token
+
+PASSWORD = "benchmark1"
+OPTION_COUNT = 4
+
+class SeededUser(NamedTuple):
+    id: int
+    email: str
+    headers: dict
+
+def bearer(user_id: int, email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': email, 'uid': user_id, 'name': 'Benchmark'})}"}
+
+def create_users(db, count: int, prefix: str, password_hash: str = "-") -> List[SeededUser]:
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f"{prefix}-{run_id}-{number}@bench.local" for number in range(count)]
+    if not emails:
+        return []
+    db.execute(insert(User), [{"email": email, "name": "Benchmark", "password": password_hash} for email in emails])
+    rows = db.execute(select(User.id, User.email).where(User.email.in_(emails))).all()
+    db.commit()
+    return [SeededUser(row.id, row.email, bearer(row.id, row.email)) for row in rows]
+
+def create_event(db, creator: SeededUser, allow_multiple_votes: bool = False) -> str:
+    new_event = event.create_event(db, EventCreate(
+        title=f"Benchmark {uuid.uuid4().hex[:8]}",
+        question="Which one?",
+        options=[f"Option {number}" for number in range(1, OPTION_COUNT + 1)],
+        allow_multiple_votes=allow_multiple_votes,
+        end_date=(datetime.now() + timedelta(days=1)).isoformat(),
+    ), creator.id)
+    return new_event.unique_code
+
+def seed_event(voter_count: int, joined: bool = False, voted: bool = False):
+    """One creator, one event and `voter_count` voters, optionally already joined or with a ballot each."""
+    db = SessionLocal()
+    try:
+        creator = create_users(db, 1, "creator")[0]
+        unique_code = create_event(db, creator)
+        voters = create_users(db, voter_count, "voter")
+        if (joined or voted) and voters:
+            event_id = db.execute(select(Event.id).where(Event.unique_code == unique_code)).scalar_one()
+            db.execute(insert(Vote), [
+                {"event_id": event_id, "voter_id": voter.id, "already_vote": voted} for voter in voters
+            ])
+            if voted:
+                cast_ballots(db, event_id)
+            db.commit()
+        return unique_code, creator, voters
+    finally:
+        db.close()
+
+def cast_ballots(db, event_id: int):
+    """One random option for every vote row of the event, keeping the vote counters in step."""
+    option_ids = db.execute(select(Option.id).where(Option.event_id == event_id)).scalars().all()
+    vote_ids = db.execute(select(Vote.id).where(Vote.event_id == event_id)).scalars().all()
+    choices = [(vote_id, random.choice(option_ids)) for vote_id in vote_ids]
+    db.execute(insert(VoteOptions), [{"vote_id": vote_id, "option_id": option_id} for vote_id, option_id in choices])
+    for option_id, count in Counter(option_id for _, option_id in choices).items():
+        db.execute(update(Option).where(Option.id == option_id).values(vote_count=count))
+
+def seed_history(history: int) -> SeededUser:
+    """A voter who joined and voted in `history` events."""
+    db = SessionLocal()
+    try:
+        creator = create_users(db, 1, "creator")[0]
+        voter = create_users(db, 1, "historian")[0]
+        for _ in range(history):
+            create_event(db, creator)
+        events = db.execute(
+            select(Event.id).where(Event.creator_id == creator.id).order_by(Event.id)
+        ).scalars().all()
+        db.execute(insert(Vote), [{"event_id": event_id, "voter_id": voter.id, "already_vote": True} for event_id in events])
+        votes = db.execute(select(Vote.id, Vote.event_id).where(Vote.voter_id == voter.id)).all()
+        first_options = dict(db.execute(
+            select(Option.event_id, Option.id).where(Option.event_id.in_(events), Option.event_option_number == 1)
+        ).all())
+        db.execute(insert(VoteOptions), [{"vote_id": vote.id, "option_id": first_options[vote.event_id]} for vote in votes])
+        db.commit()
+        return voter
+    finally:
+        db.close()
+
+def seed_login_users(count: int) -> List[SeededUser]:
+    """Users with a real bcrypt hash of PASSWORD, so logins exercise the hashing pool."""
+    password_hash = hashing.hash_password(PASSWORD)
+    db = SessionLocal()
+    try:
+        return create_users(db, count, "login", password_hash)
+    finally:
+        db.close()
@@ -0,0 +1,134 @@
+"""Compare response_model serialization with the row-tuple builders used by the hot read routes.
+
+CPU only, no database. For each payload size it times the previous path (pydantic models built from
+ORM objects, validated and dumped the way FastAPI does for a response_model) against
+app.models.serializers + app.utils.responses.dumps:
+
+    python -m benchmarks.serialization --repeat 2000
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+from app.db.database import Event, Option
+from app.models import serializers
+from app.models.event import snapshot_event
+from app.models.schemas import EventResponse, OptionResponse, UserVoteResponse
+from app.utils import responses
+
+EventRow = namedtuple("EventRow", "id unique_code title question allow_multiple_votes created_date end_date")
+VoteRow = namedtuple("VoteRow", "id joined_at voted_at title question unique_code")
+
+def make_event(event_id: int, option_count: int) -> Event:
+    created = datetime(2026, 1, 1, 12, 0, 0) + timedelta(minutes=event_id)
+    event = Event(
+        id=event_id, creator_id=1, unique_code=f"C{event_id:04d}", title=f"Event {event_id}",
+        question="Which one do you prefer?", allow_multiple_votes=False,
+        created_date=created, end_date=created + timedelta(days=1),
+    )
+    event.options = [
+        Option(id=event_id * 1000 + number, event_id=event_id, event_option_number=number, option_text=f"Option {number}")
+        for number in range(1, option_count + 1)
+    ]
+    return event
+
+def timed(fn, repeat: int) -> float:
+    """Mean microseconds per call."""
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1_000_000
+
+def details_case(option_count: int):
+    event = make_event(1, option_count)
+    snapshot = snapshot_event(event, event.options)
+    adapter = TypeAdapter(EventResponse)
+
+    def current():
+        built = EventResponse(
+            unique_code=snapshot.unique_code, title=snapshot.title, question=snapshot.question,
+            allow_multiple_votes=snapshot.allow_multiple_votes, created_date=snapshot.created_date,
+            end_date=snapshot.end_date,
+            options=[OptionResponse(event_option_number=o.event_option_number, option_text=o.option_text) for o in snapshot.options],
+        )
+        return adapter.dump_json(adapter.validate_python(built))
+
+    def fast():
+        return responses.dumps(serializers.event_details_payload(snapshot))
+
+    return current, fast
+
+def event_list_case(event_count: int):
+    events = [make_event(event_id, 4) for event_id in range(1, event_count + 1)]
+    rows = [
+        EventRow(e.id, e.unique_code, e.title, e.question, e.allow_multiple_votes, e.created_date, e.end_date)
+        for e in events
+    ]
+    options = {e.id: [(o.event_option_number, o.option_text) for o in e.options] for e in events}
+    adapter = TypeAdapter(List[EventResponse])
+
+    def current():
+        return adapter.dump_json(adapter.validate_python(events, from_attributes=True))
+
+    def fast():
+        return responses.dumps([
+            serializers.event_payload(row, [serializers.option_payload(*option) for option in options[row.id]])
+            for row in rows
+        ])
+
+    return current, fast
+
+def vote_list_case(vote_count: int):
+    voted_at = datetime(2026, 1, 1, 12, 0, 0)
+    rows = [VoteRow(vote_id, voted_at, voted_at, f"Event {vote_id}", "Which one?", f"C{vote_id:04d}") for vote_id in range(vote_count)]
+    choices = [(1, "Option 1"), (3, "Option 3")]
+    dicts = [
+        {
+            "event_title": row.title, "event_question": row.question, "event_unique_code": row.unique_code,
+            "vote_choices": [{"event_option_number": n, "option_text": t} for n, t in choices], "voted_at": row.voted_at,
+        }
+        for row in rows
+    ]
+    adapter = TypeAdapter(List[UserVoteResponse])
+
+    def current():
+        return adapter.dump_json(adapter.validate_python(dicts))
+
+    def fast():
+        return responses.dumps([
+            serializers.user_vote_payload(row, [serializers.option_payload(*choice) for choice in choices])
+            for row in rows
+        ])
+
+    return current, fast
+
+CASES = [
+    ("event details, 4 options", details_case, 4),
+    ("event details, 50 options", details_case, 50),
+    ("/events/retrieve, 20 events", event_list_case, 20),
+    ("/events/retrieve, 100 events", event_list_case, 100),
+    ("/home/retrieve, 20 votes", vote_list_case, 20),
+    ("/home/retrieve, 100 votes", vote_list_case, 100),
+]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1000, help="Calls per measurement")
+    args = parser.parse_args(argv)
+
+    encoder = "orjson" if responses.orjson is not None else "json"
+    print(f"encoder={encoder}")
+    print(f"{'payload':<32}{'bytes':>8}{'current us':>12}{'fast us':>10}{'speedup':>9}")
+    for name, build, size in CASES:
+        current, fast = build(size)
+        current_us = timed(current, args.repeat)
+        fast_us = timed(fast, args.repeat)
+        print(f"{name:<32}{len(fast()):>8}{current_us:>12.1f}{fast_us:>10.1f}{current_us / fast_us:>8.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+from typing import List
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def summarize(name: str, latencies: List[float], elapsed: float, statements: int) -> dict:
+    requests = len(latencies)
+    return {
+        "scenario": name,
+        "requests": requests,
+        "requests_per_sec": round(requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "sql_per_request": round(statements / requests, 2) if requests else 0.0,
+    }
@@ -0,0 +1,96 @@
+"""Compare the sync /events routes with their /async/events counterparts on the same database.
+
+Run from the repository root, e.g. against a local SQLite file:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.sync_vs_async --levels 1,8,32 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import httpx
+from app.db.database import create_schema, init_engine
+from app.main import app
+from benchmarks.seed import seed_event
+from benchmarks.stats import percentile
+
+PREFIXES = {"sync": "/events", "async": "/async/events"}
+SCENARIOS = ("details", "result", "cast-vote")
+
+async def run_level(client, prefix: str, scenario: str, concurrency: int, requests: int, unique_code, creator, voters):
+    latencies = []
+    queue = asyncio.Queue()
+    for number in range(requests):
+        queue.put_nowait(number)
+
+    async def worker():
+        while not queue.empty():
+            number = queue.get_nowait()
+            started = time.perf_counter()
+            if scenario == "details":
+                response = await client.get(f"{prefix}/{unique_code}", headers=creator)
+            elif scenario == "result":
+                response = await client.post(f"{prefix}/result", headers=creator, json={"unique_code": unique_code})
+            else:
+                response = await client.post(f"{prefix}/cast-vote", headers=voters.pop(), json={
+                    "unique_code": unique_code, "event_option_numbers": [number % 4 + 1],
+                })
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": "async" if prefix == PREFIXES["async"] else "sync",
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "requests_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+async def run(args):
+    levels = [int(level) for level in args.levels.split(",")]
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for mode, prefix in PREFIXES.items():
+                unique_code, creator, voters = seed_event(args.requests * len(levels), joined=True)
+                creator, voters = creator.headers, [voter.headers for voter in voters]
+                for scenario in SCENARIOS:
+                    for concurrency in levels:
+                        results.append(await run_level(
+                            client, prefix, scenario, concurrency, args.requests, unique_code, creator, voters,
+                        ))
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", default="1,8,32", help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and level")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    create_schema(init_engine())
+    results = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'scenario':<10} {'conc':>5} {'sync rps':>10} {'async rps':>10} {'sync p99':>10} {'async p99':>10}")
+    by_key = {(row["mode"], row["scenario"], row["concurrency"]): row for row in results}
+    for scenario in SCENARIOS:
+        for concurrency in [int(level) for level in args.levels.split(",")]:
+            sync_row = by_key[("sync", scenario, concurrency)]
+            async_row = by_key[("async", scenario, concurrency)]
+            print(f"{scenario:<10} {concurrency:>5} {sync_row['requests_per_sec']:>10} {async_row['requests_per_sec']:>10} "
+                  f"{sync_row['p99_ms']:>8}ms {async_row['p99_ms']:>8}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
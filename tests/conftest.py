@@ -0,0 +1,28 @@
+"""The app runs in-process against a throwaway SQLite database (or TEST_DATABASE_URL)."""
+import os
+import tempfile
+
+# Settings are read when the app modules are imported, so the environment is set up first.
+os.environ["DATABASE_URL"] = (
+    os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp(prefix='livevote-tests-')}/tests.db"
+)
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "4")
+# Tests send many requests as one user, and record statements without the finalizer's in between.
+os.environ["ADMISSION_USER_RATE"] = "0"
+os.environ["RESULT_FINALIZE_INTERVAL_SECONDS"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="session")
+def engine():
+    from app.db.database import create_schema, init_engine
+    engine = init_engine()
+    create_schema(engine)
+    return engine
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
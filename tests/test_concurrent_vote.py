@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+import pytest
+from sqlalchemy import func, select
+from app.db.database import SessionLocal, Event, Option, VoteOptions
+from benchmarks import seed
+
+# Below the default database slot count, so no submission is turned away before it races.
+PARALLEL = 12
+
+@pytest.mark.parametrize("path", ["/events/cast-vote", "/async/events/cast-vote"])
+def test_parallel_ballots_from_one_voter_are_counted_once(client, path):
+    unique_code, _, voters = seed.seed_event(1, joined=True)
+    barrier = Barrier(PARALLEL)
+
+    def submit(_):
+        barrier.wait()
+        return client.post(path, headers=voters[0].headers, json={
+            "unique_code": unique_code,
+            "event_option_numbers": [1],
+        }).status_code
+
+    with ThreadPoolExecutor(max_workers=PARALLEL) as pool:
+        statuses = list(pool.map(submit, range(PARALLEL)))
+
+    assert statuses.count(200) == 1
+    assert statuses.count(400) == PARALLEL - 1
+
+    with SessionLocal() as db:
+        option_ids = select(Option.id).join(Event).where(Event.unique_code == unique_code)
+        tally = db.scalar(select(func.sum(Option.vote_count)).where(Option.id.in_(option_ids)))
+        ballots = db.scalar(select(func.count()).select_from(VoteOptions).where(VoteOptions.option_id.in_(option_ids)))
+    assert tally == 1
+    assert ballots == 1
@@ -0,0 +1,8 @@
+from benchmarks import query_plans
+
+def test_hot_routes_never_scan_a_whole_table(engine, client):
+    plans = query_plans.explain_routes(engine, client, voters=200, history=100)
+
+    assert plans
+    full_scans = [(route, " ".join(statement.split()), scanned) for route, statement, scanned in plans if scanned]
+    assert full_scans == []